@@ -3,3 +3,18 @@ class APIEndpointError(Exception):
     def __init__(self, message="API endpoint has changed. Script will terminate."):
         self.message = message
         super().__init__(self.message)
+
+class AuthenticationError(APIEndpointError):
+    # Raised on 401 - the account's init data is stale, the API itself is fine
+    def __init__(self, message="Authentication failed"):
+        super().__init__(message)
+
+class EndpointUnavailableError(APIEndpointError):
+    # Raised when an endpoint keeps failing after retries (5xx, timeouts, ...)
+    def __init__(self, message="Endpoint temporarily unavailable"):
+        super().__init__(message)
+
+class CircuitOpenError(EndpointUnavailableError):
+    # Raised without sending anything while an endpoint's circuit breaker is open
+    def __init__(self, message="Circuit breaker open"):
+        super().__init__(message)
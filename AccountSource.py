@@ -0,0 +1,58 @@
+# AccountSource.py
+import hashlib
+import os
+from typing import Callable, Dict, Optional, Tuple
+
+class AccountSource:
+    # Loads data.txt as {account key: encoded init data}, re-encoding only lines that changed.
+    # `accept` sees the raw line first, so lines another shard owns are never encoded
+    def __init__(self, path: str, encode: Callable[[str], str], key: Callable[[str], str],
+                 accept: Optional[Callable[[str], bool]] = None):
+        self.path = path
+        self.encode = encode
+        self.key = key
+        self.accept = accept
+        self.accounts: Dict[str, str] = {}
+        # SHA-1 digest of each raw line -> its account key, None marks a line `accept` rejected.
+        # The encoded value itself only lives in `accounts`
+        self._keys: Dict[bytes, Optional[str]] = {}
+        self._signature: Optional[Tuple[int, int]] = None
+
+    def signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def changed(self) -> bool:
+        return self.signature() != self._signature
+
+    def load(self) -> Dict[str, str]:
+        self._signature = self.signature()
+        previous = self.accounts
+        keys: Dict[bytes, Optional[str]] = {}
+        accounts: Dict[str, str] = {}
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line in file:
+                raw = line.strip()
+                if not raw:
+                    continue
+                digest = hashlib.sha1(raw.encode()).digest()
+                if digest in self._keys:
+                    account_key = keys[digest] = self._keys[digest]
+                    if account_key is None:
+                        continue
+                    if account_key in previous:
+                        accounts[account_key] = previous[account_key]
+                        continue
+                if self.accept is not None and not self.accept(raw):
+                    keys[digest] = None
+                    continue
+                encoded = self.encode(raw)
+                account_key = keys[digest] = self.key(encoded)
+                accounts[account_key] = encoded
+        # Lines removed from the file drop out of both maps here
+        self._keys = keys
+        self.accounts = accounts
+        return accounts
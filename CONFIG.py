@@ -1,2 +1,74 @@
 GUILD_ID = "95c1178a-6087-4a82-aa9f-b20449d26f0c"
-REFERRAL_CODE = "MK3PV3" #change to your refferal code
\ No newline at end of file
+REFERRAL_CODE = "MK3PV3" #change to your refferal code
+
+# HTTP connection pool
+CONNECTION_LIMIT = 100
+CONNECTION_LIMIT_PER_HOST = 20
+KEEPALIVE_TIMEOUT = 60
+DNS_CACHE_TTL = 300
+
+# Account scheduler
+MAX_CONCURRENT_ACCOUNTS = 5
+MAX_REQUESTS_PER_SECOND = 10 # global cap across all accounts and shards (split evenly between shards), 0 disables
+
+# Endpoint validation cache (seconds)
+ENDPOINT_HEALTH_TTL = 3600
+
+# Per-account state store
+STATE_DB = "state.db"
+DAILY_RESET_HOUR_UTC = 0 # hour (UTC) when daily check-in and daily quests reset
+
+# Deadline scheduler (seconds)
+TREASURY_INTERVAL = 3600 # treasury cooldown after a successful claim, when the response does not report leftSecondsUntilTreasury
+QUEST_REFRESH_INTERVAL = 3600 # how often to look for newly published quests
+QUEST_CATALOG_TTL = 1800 # quest lists are shared by all accounts and refetched after this or the daily reset
+TASK_RETRY_DELAY = 600 # retry delay after a failed task
+SCHEDULER_BATCH_WINDOW = 30 # tasks due within this window run in the same wake-up
+
+# Metrics export
+METRICS_FILE = "metrics.json" # JSON snapshot flushed periodically, empty string disables
+METRICS_FLUSH_INTERVAL = 60
+METRICS_PORT = 0 # serve Prometheus text on http://0.0.0.0:<port>/metrics, 0 disables
+
+# Quest pipeline
+QUEST_CONCURRENCY = 4 # parallel quest requests per account
+QUEST_VERIFY_DELAY = 3 # seconds to wait before re-polling quests in VERIFY
+QUEST_VERIFY_POLLS = 1 # re-polls before a VERIFY quest is left for the next run
+
+# Multi-process runner
+SHARDS = 1 # worker processes, each with its own event loop and slice of the accounts
+
+# Logging
+LOG_FORMAT = "text" # "text" for coloured console output, "json" for JSON lines without ANSI codes
+
+# JSON decoding
+JSON_BACKEND = "auto" # "auto" uses orjson when installed, "orjson" requires it, "json" forces the stdlib
+
+# Request headers
+USER_AGENT_POOL_SIZE = 20 # user agents sampled once per process and shared by all accounts
+
+# Retries and circuit breakers, shared by every account in the process
+RETRY_MAX_ATTEMPTS = 3 # attempts per request, including the first
+RETRY_BASE_DELAY = 1 # seconds, decorrelated jitter starts from here
+RETRY_MAX_DELAY = 30 # seconds, cap on a single backoff or Retry-After wait
+BREAKER_FAILURE_THRESHOLD = 5 # consecutive failures before an endpoint is backed off
+BREAKER_RESET_TIMEOUT = 60 # seconds an open breaker waits before letting one probe through
+
+# Crash recovery
+CHECKPOINT_FILE = "checkpoint.json" # progress of the running cycle, used to resume after a restart; "" disables
+
+# Account workflow, seconds before a step is abandoned (steps not listed have no limit)
+STEP_TIMEOUTS = {
+    "validate": 180,
+    "user_info": 60,
+    "checkin": 60,
+    "referral": 60,
+    "quests": 300, # each of the daily and single quest runs
+    "treasury": 60,
+    "warbonds": 120,
+    "final": 60,
+}
+
+# Tracing
+TRACE_FILE = "" # e.g. "trace.json": Chrome/Perfetto trace of every method call, request and sleep, written as trace.cycleN.json; "" disables
+TRACE_MAX_EVENTS = 200000 # events kept per trace file (one per cycle), later ones are dropped
@@ -0,0 +1,127 @@
+# Checkpoint.py
+import json
+import os
+import time
+from typing import Dict, IO, Optional, Set
+
+class CycleCheckpoint:
+    # Progress of the running cycle, so a restart picks up the unfinished accounts
+    # instead of starting the cycle over. Steps are appended to a journal as they finish;
+    # the snapshot is only rewritten (and the journal emptied) when a cycle starts or ends
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.journal_path = f"{path}.journal" if path else None
+        self.cycle = 0
+        self.in_progress = False
+        self.due: Dict[str, Set[str]] = {}
+        self.steps: Dict[str, Set[str]] = {}
+        self.done: Set[str] = set()
+        self._journal: Optional[IO[str]] = None
+
+    def load(self) -> bool:
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            self.cycle = int(data["cycle"])
+            self.in_progress = bool(data["in_progress"])
+            self.due = {account: set(tasks) for account, tasks in data.get("due", {}).items()}
+            self.steps = {account: set(steps) for account, steps in data.get("steps", {}).items()}
+            self.done = set(data.get("done", []))
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        if self.in_progress:
+            self._replay_journal()
+        return True
+
+    def _replay_journal(self):
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as file:
+                lines = file.readlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Torn last line from a crash mid-write
+                continue
+            if entry.get("cycle") != self.cycle:
+                continue
+            if entry.get("done"):
+                self.done.add(entry["account"])
+                self.steps.pop(entry["account"], None)
+            elif entry["account"] not in self.done:
+                self.steps.setdefault(entry["account"], set()).add(entry["step"])
+
+    def pending(self) -> Dict[str, Set[str]]:
+        if not self.in_progress:
+            return {}
+        return {account: tasks for account, tasks in self.due.items() if account not in self.done}
+
+    def completed_steps(self, account: str) -> Set[str]:
+        return self.steps.get(account, set()) if self.in_progress else set()
+
+    def begin_cycle(self, cycle: int, due: Dict[str, Set[str]]):
+        self.cycle = cycle
+        self.in_progress = True
+        self.due = {account: set(tasks) for account, tasks in due.items()}
+        self.steps = {}
+        self.done = set()
+        self.compact()
+
+    def complete_step(self, account: str, step: str):
+        if not self.in_progress:
+            return
+        self.steps.setdefault(account, set()).add(step)
+        self._append({"cycle": self.cycle, "account": account, "step": step})
+
+    def complete_account(self, account: str):
+        if not self.in_progress:
+            return
+        self.done.add(account)
+        self.steps.pop(account, None)
+        self._append({"cycle": self.cycle, "account": account, "done": True})
+
+    def finish_cycle(self):
+        self.in_progress = False
+        self.due = {}
+        self.steps = {}
+        self.done = set()
+        self.compact()
+
+    def _append(self, entry: dict):
+        # One short line per step; flushed so it survives the process dying, fsynced only on compaction
+        if not self.journal_path:
+            return
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._journal.flush()
+
+    def compact(self):
+        if not self.path:
+            return
+        data = {
+            "cycle": self.cycle,
+            "in_progress": self.in_progress,
+            "updated_at": time.time(),
+            "due": {account: sorted(tasks) for account, tasks in self.due.items()},
+            "steps": {account: sorted(steps) for account, steps in self.steps.items()},
+            "done": sorted(self.done),
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+        # Everything in the journal is now part of the snapshot
+        self.close()
+        open(self.journal_path, "w").close()
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
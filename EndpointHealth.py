@@ -0,0 +1,31 @@
+# EndpointHealth.py
+import asyncio
+import time
+from typing import Dict, Tuple
+
+class EndpointHealth:
+    # Cycle-wide cache of validated endpoints shared by every account
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._validated: Dict[Tuple[str, str], float] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+    def is_healthy(self, endpoint_key: str, method: str) -> bool:
+        checked_at = self._validated.get((endpoint_key, method.upper()))
+        return checked_at is not None and time.monotonic() - checked_at < self.ttl
+
+    def lock(self, endpoint_key: str, method: str) -> asyncio.Lock:
+        key = (endpoint_key, method.upper())
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        return self._locks[key]
+
+    def mark_healthy(self, endpoint_key: str, method: str):
+        self._validated[(endpoint_key, method.upper())] = time.monotonic()
+
+    def invalidate(self, endpoint_key: str):
+        for key in [key for key in self._validated if key[0] == endpoint_key]:
+            del self._validated[key]
+
+    def clear(self):
+        self._validated.clear()
@@ -0,0 +1,92 @@
+# LogPipeline.py
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import sys
+from typing import Optional
+
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*m')
+
+# Set per account task in process_account; asyncio copies it into every child task
+account_context: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("account", default=None)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+
+class ContextFilter(logging.Filter):
+    # Runs on the caller's side so it still sees the account of the current task
+    def __init__(self, shard: Optional[int] = None):
+        super().__init__()
+        self.shard = shard
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.account = account_context.get()
+        record.shard = self.shard
+        return True
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    # Unlike QueueHandler, leave msg % args formatting to the writer thread
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        prefix = ""
+        if getattr(record, "shard", None) is not None:
+            prefix += f"[shard {record.shard}] "
+        if getattr(record, "account", None):
+            prefix += f"[{record.account}] "
+        if not prefix:
+            return message
+        body = message.lstrip("\n")
+        return message[:len(message) - len(body)] + prefix + body
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": ANSI_ESCAPE.sub("", record.getMessage()).strip(),
+        }
+        if getattr(record, "account", None):
+            entry["account"] = record.account
+        if getattr(record, "shard", None) is not None:
+            entry["shard"] = record.shard
+        if record.exc_info:
+            entry["exc"] = ANSI_ESCAPE.sub("", self.formatException(record.exc_info))
+        return json.dumps(entry, ensure_ascii=False)
+
+def setup_logging(log_format: str = "text", shard: Optional[int] = None, level: int = logging.INFO):
+    # Callers only enqueue records; a background thread formats and writes them
+    global _listener, _queue_handler
+    stop_logging()
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+
+    _queue_handler = LazyQueueHandler(queue.SimpleQueue())
+    _queue_handler.addFilter(ContextFilter(shard))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+def stop_logging():
+    # Flushes everything still queued
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(stop_logging)
@@ -0,0 +1,125 @@
+# Metrics.py
+import json
+import os
+import time
+from typing import Dict, List, Tuple
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Metrics:
+    # Per-endpoint request telemetry, exported as Prometheus text or JSON
+    def __init__(self):
+        self.started_at = time.time()
+        self.latency_buckets: Dict[str, List[int]] = {}
+        self.latency_sum: Dict[str, float] = {}
+        self.latency_count: Dict[str, int] = {}
+        self.status_counts: Dict[Tuple[str, int], int] = {}
+        self.error_counts: Dict[Tuple[str, str], int] = {}
+        self.retry_counts: Dict[str, int] = {}
+        self.bytes_sent: Dict[str, int] = {}
+        self.bytes_received: Dict[str, int] = {}
+        self.sleep_seconds: Dict[str, float] = {}
+        self.sleep_counts: Dict[str, int] = {}
+
+    def observe_latency(self, endpoint_key: str, seconds: float):
+        buckets = self.latency_buckets.setdefault(endpoint_key, [0] * len(LATENCY_BUCKETS))
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                buckets[i] += 1
+        self.latency_sum[endpoint_key] = self.latency_sum.get(endpoint_key, 0.0) + seconds
+        self.latency_count[endpoint_key] = self.latency_count.get(endpoint_key, 0) + 1
+
+    def observe_request(self, endpoint_key: str, status: int, seconds: float):
+        self.observe_latency(endpoint_key, seconds)
+        key = (endpoint_key, status)
+        self.status_counts[key] = self.status_counts.get(key, 0) + 1
+
+    def observe_error(self, endpoint_key: str, error: str, seconds: float):
+        self.observe_latency(endpoint_key, seconds)
+        key = (endpoint_key, error)
+        self.error_counts[key] = self.error_counts.get(key, 0) + 1
+
+    def record_retry(self, endpoint_key: str):
+        self.retry_counts[endpoint_key] = self.retry_counts.get(endpoint_key, 0) + 1
+
+    def add_bytes(self, endpoint_key: str, sent: int = 0, received: int = 0):
+        if sent:
+            self.bytes_sent[endpoint_key] = self.bytes_sent.get(endpoint_key, 0) + sent
+        if received:
+            self.bytes_received[endpoint_key] = self.bytes_received.get(endpoint_key, 0) + received
+
+    def record_sleep(self, reason: str, seconds: float):
+        self.sleep_seconds[reason] = self.sleep_seconds.get(reason, 0.0) + seconds
+        self.sleep_counts[reason] = self.sleep_counts.get(reason, 0) + 1
+
+    def to_dict(self) -> Dict:
+        endpoints = {}
+        for endpoint_key, count in self.latency_count.items():
+            endpoints[endpoint_key] = {
+                "requests": count,
+                "latency_avg_s": round(self.latency_sum[endpoint_key] / count, 6),
+                "latency_buckets": {
+                    f"le_{bound}": hits for bound, hits in zip(LATENCY_BUCKETS, self.latency_buckets[endpoint_key])
+                },
+                "status": {str(status): n for (key, status), n in self.status_counts.items() if key == endpoint_key},
+                "errors": {error: n for (key, error), n in self.error_counts.items() if key == endpoint_key},
+                "retries": self.retry_counts.get(endpoint_key, 0),
+                "bytes_sent": self.bytes_sent.get(endpoint_key, 0),
+                "bytes_received": self.bytes_received.get(endpoint_key, 0),
+            }
+        return {
+            "started_at": self.started_at,
+            "updated_at": time.time(),
+            "endpoints": endpoints,
+            "sleeps": {
+                reason: {"count": self.sleep_counts[reason], "seconds": round(seconds, 3)}
+                for reason, seconds in self.sleep_seconds.items()
+            },
+        }
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP memeswar_request_duration_seconds Request latency per endpoint key",
+            "# TYPE memeswar_request_duration_seconds histogram",
+        ]
+        for endpoint_key, buckets in self.latency_buckets.items():
+            for bound, hits in zip(LATENCY_BUCKETS, buckets):
+                lines.append(f'memeswar_request_duration_seconds_bucket{{endpoint="{endpoint_key}",le="{bound}"}} {hits}')
+            count = self.latency_count[endpoint_key]
+            lines.append(f'memeswar_request_duration_seconds_bucket{{endpoint="{endpoint_key}",le="+Inf"}} {count}')
+            lines.append(f'memeswar_request_duration_seconds_sum{{endpoint="{endpoint_key}"}} {self.latency_sum[endpoint_key]}')
+            lines.append(f'memeswar_request_duration_seconds_count{{endpoint="{endpoint_key}"}} {count}')
+
+        lines += ["# HELP memeswar_responses_total Responses per endpoint key and status code",
+                  "# TYPE memeswar_responses_total counter"]
+        for (endpoint_key, status), n in self.status_counts.items():
+            lines.append(f'memeswar_responses_total{{endpoint="{endpoint_key}",status="{status}"}} {n}')
+
+        lines += ["# HELP memeswar_request_errors_total Requests that raised before a response",
+                  "# TYPE memeswar_request_errors_total counter"]
+        for (endpoint_key, error), n in self.error_counts.items():
+            lines.append(f'memeswar_request_errors_total{{endpoint="{endpoint_key}",error="{error}"}} {n}')
+
+        lines += ["# HELP memeswar_retries_total Retries per endpoint key",
+                  "# TYPE memeswar_retries_total counter"]
+        for endpoint_key, n in self.retry_counts.items():
+            lines.append(f'memeswar_retries_total{{endpoint="{endpoint_key}"}} {n}')
+
+        lines += ["# HELP memeswar_bytes_total Bytes transferred per endpoint key",
+                  "# TYPE memeswar_bytes_total counter"]
+        for endpoint_key, n in self.bytes_sent.items():
+            lines.append(f'memeswar_bytes_total{{endpoint="{endpoint_key}",direction="sent"}} {n}')
+        for endpoint_key, n in self.bytes_received.items():
+            lines.append(f'memeswar_bytes_total{{endpoint="{endpoint_key}",direction="received"}} {n}')
+
+        lines += ["# HELP memeswar_sleep_seconds_total Time spent in deliberate sleeps",
+                  "# TYPE memeswar_sleep_seconds_total counter"]
+        for reason, seconds in self.sleep_seconds.items():
+            lines.append(f'memeswar_sleep_seconds_total{{reason="{reason}"}} {seconds}')
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, indent=2)
+        os.replace(tmp_path, path)
@@ -0,0 +1,104 @@
+# Models.py
+import json
+from typing import Any, Callable, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_loads: Callable[[Any], Any] = json.loads
+json_backend = "json"
+
+def set_json_backend(name: str = "auto") -> str:
+    # "auto" picks orjson when it is installed and falls back to the stdlib
+    global _loads, json_backend
+    if name in ("auto", "orjson") and orjson is not None:
+        _loads, json_backend = orjson.loads, "orjson"
+    elif name == "orjson":
+        raise ImportError("JSON_BACKEND is 'orjson' but orjson is not installed")
+    else:
+        _loads, json_backend = json.loads, "json"
+    return json_backend
+
+def loads(body: bytes) -> Any:
+    return _loads(body)
+
+async def read_json(response) -> dict:
+    # Decode the raw body directly, skipping aiohttp's text decode and content-type check
+    return loads(await response.read())
+
+class UserInfo:
+    __slots__ = ("nickname", "honor_points", "honor_point_rank", "warbond_tokens")
+
+    def __init__(self, nickname: str, honor_points, honor_point_rank, warbond_tokens: str):
+        self.nickname = nickname
+        self.honor_points = honor_points
+        self.honor_point_rank = honor_point_rank
+        self.warbond_tokens = warbond_tokens
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "UserInfo":
+        user = payload["data"]["user"]
+        return cls(user["nickname"], user["honorPoints"], user["honorPointRank"], str(user["warbondTokens"]))
+
+    def with_warbonds(self, warbond_tokens) -> "UserInfo":
+        return UserInfo(self.nickname, self.honor_points, self.honor_point_rank, str(warbond_tokens))
+
+class QuestInfo:
+    __slots__ = ("id", "type", "title")
+
+    def __init__(self, quest_id, quest_type: str, title: str):
+        self.id = quest_id
+        self.type = quest_type
+        self.title = title
+
+    @classmethod
+    def list_from_payload(cls, payload: dict) -> list:
+        return [cls(quest["id"], quest["type"], quest["title"])
+                for quest in payload.get("data", {}).get("quests", [])]
+
+class QuestProgress:
+    __slots__ = ("status", "reward_amount")
+
+    def __init__(self, status: Optional[str], reward_amount: str):
+        self.status = status
+        self.reward_amount = reward_amount
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "QuestProgress":
+        data = payload.get("data") or {}
+        return cls(data.get("status"), (data.get("reward") or {}).get("rewardAmount", ""))
+
+class TreasuryReward:
+    # reward_amount is None when the claim hit the cooldown instead of paying out
+    __slots__ = ("reward_amount", "left_seconds")
+
+    def __init__(self, reward_amount: Optional[str], left_seconds: Optional[float] = None):
+        self.reward_amount = reward_amount
+        self.left_seconds = left_seconds
+
+    @property
+    def claimed(self) -> bool:
+        return self.reward_amount is not None
+
+    @staticmethod
+    def parse_left_seconds(payload) -> Optional[float]:
+        # Seconds until the next claim, sent with a claim and with a cooldown error
+        if not isinstance(payload, dict):
+            return None
+        for source in (payload.get("data"), payload):
+            if isinstance(source, dict) and source.get("leftSecondsUntilTreasury") is not None:
+                try:
+                    return max(0.0, float(source["leftSecondsUntilTreasury"]))
+                except (TypeError, ValueError):
+                    return None
+        return None
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "TreasuryReward":
+        return cls(payload["data"]["rewards"][0]["rewardAmount"], cls.parse_left_seconds(payload))
+
+    @classmethod
+    def cooldown(cls, payload) -> "TreasuryReward":
+        return cls(None, cls.parse_left_seconds(payload))
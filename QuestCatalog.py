@@ -0,0 +1,41 @@
+# QuestCatalog.py
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from Models import QuestInfo
+from StateStore import last_reset_at
+
+class QuestCatalog:
+    # Quest definitions are the same for every account, so each list is fetched once
+    # and shared until it expires or the daily reset may have changed it
+    def __init__(self, ttl: float, reset_hour_utc: int = 0):
+        self.ttl = ttl
+        self.reset_hour_utc = reset_hour_utc
+        self._quests: Dict[str, Tuple[float, List[QuestInfo]]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def get(self, quest_type: str) -> Optional[List[QuestInfo]]:
+        entry = self._quests.get(quest_type)
+        if entry is None:
+            return None
+        fetched_at, quests = entry
+        now = time.time()
+        if now - fetched_at >= self.ttl or fetched_at < last_reset_at(self.reset_hour_utc, now):
+            del self._quests[quest_type]
+            return None
+        return quests
+
+    def lock(self, quest_type: str) -> asyncio.Lock:
+        if quest_type not in self._locks:
+            self._locks[quest_type] = asyncio.Lock()
+        return self._locks[quest_type]
+
+    def put(self, quest_type: str, quests: List[QuestInfo]):
+        self._quests[quest_type] = (time.time(), quests)
+
+    def invalidate(self, quest_type: str):
+        self._quests.pop(quest_type, None)
+
+    def clear(self):
+        self._quests.clear()
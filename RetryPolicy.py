@@ -0,0 +1,102 @@
+# RetryPolicy.py
+import email.utils
+import random
+import time
+from typing import Dict, Optional
+
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE", "OPTIONS")
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Retry-After is either a number of seconds or an HTTP date
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+class CircuitBreaker:
+    # Opens after repeated failures so every account backs off the endpoint together,
+    # then lets a single request through to probe whether it recovered
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.blocked_until = 0.0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def retry_in(self) -> float:
+        # Seconds left on a Retry-After / 429 pause shared by all accounts
+        return max(0.0, self.blocked_until - time.monotonic())
+
+    def block(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open" or self.probing:
+            return False
+        self.probing = True
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_throttle(self):
+        # A 429 means the endpoint is up but busy, the shared pause handles it
+        self.probing = False
+
+    def release(self):
+        # The probe ended without an answer either way, let the next request probe again
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+class RetryPolicy:
+    # Decorrelated jitter backoff plus one circuit breaker per endpoint key, shared process-wide
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float,
+                 failure_threshold: int, reset_timeout: float):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker(self, endpoint_key: str) -> CircuitBreaker:
+        if endpoint_key not in self._breakers:
+            self._breakers[endpoint_key] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return self._breakers[endpoint_key]
+
+    def next_delay(self, previous: Optional[float] = None) -> float:
+        previous = self.base_delay if previous is None else previous
+        return min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, previous * 3)))
+
+    def clear(self):
+        self._breakers.clear()
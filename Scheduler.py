@@ -0,0 +1,46 @@
+# Scheduler.py
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+class DeadlineScheduler:
+    # Min-heap of (next eligible time, account, task) deadlines
+    def __init__(self):
+        self._heap: List[Tuple[float, int, str, str]] = []
+        self._seq = itertools.count()
+        # Latest entry per (account, task); older heap entries are skipped when popped
+        self._current: Dict[Tuple[str, str], int] = {}
+
+    def __len__(self) -> int:
+        return len(self._current)
+
+    def schedule(self, due_at: float, account: str, task: str):
+        seq = next(self._seq)
+        self._current[(account, task)] = seq
+        heapq.heappush(self._heap, (due_at, seq, account, task))
+
+    def discard(self, account: str, tasks: Optional[Set[str]] = None):
+        for key in [key for key in self._current if key[0] == account and (tasks is None or key[1] in tasks)]:
+            del self._current[key]
+
+    def _drop_stale(self):
+        while self._heap:
+            _, seq, account, task = self._heap[0]
+            if self._current.get((account, task)) == seq:
+                return
+            heapq.heappop(self._heap)
+
+    def next_due(self) -> Optional[float]:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[float] = None, window: float = 0) -> Dict[str, Set[str]]:
+        # Everything due within `window` seconds runs together so one account visit covers it
+        now = time.time() if now is None else now
+        due: Dict[str, Set[str]] = {}
+        while self.next_due() is not None and self._heap[0][0] <= now + window:
+            _, _, account, task = heapq.heappop(self._heap)
+            del self._current[(account, task)]
+            due.setdefault(account, set()).add(task)
+        return due
@@ -0,0 +1,97 @@
+# ShardRunner.py
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+from typing import Callable, Dict, List, Optional
+
+from colorama import Fore, Style
+
+logger = logging.getLogger(__name__)
+
+def shard_worker(shard_index: int, shard_count: int, progress_queue):
+    import main
+    main.configure_shard(shard_index, shard_count, progress_queue)
+    try:
+        asyncio.run(main.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        progress_queue.put({"type": "exited", "shard": shard_index})
+
+def interrupt(worker: multiprocessing.Process):
+    # SIGINT lets asyncio.run cancel cleanly so sessions, metrics and the state DB get closed
+    if not worker.is_alive():
+        return
+    if os.name == "nt":
+        worker.terminate()
+    else:
+        os.kill(worker.pid, signal.SIGINT)
+
+def shutdown(workers: List[multiprocessing.Process], timeout: float = 15, interrupted: bool = False):
+    # After Ctrl-C the terminal already sent SIGINT to every worker, give them
+    # a moment before signalling again so their cleanup is not interrupted
+    if interrupted:
+        for worker in workers:
+            worker.join(3)
+    for worker in workers:
+        interrupt(worker)
+    for worker in workers:
+        worker.join(timeout)
+        if worker.is_alive():
+            logger.error(f"{Fore.RED}[!] {worker.name} did not stop in time, terminating{Style.RESET_ALL}")
+            worker.terminate()
+            worker.join()
+
+def run_sharded(shard_count: int, print_banner: Optional[Callable[[], None]] = None):
+    # main.py runs as __main__ here, so it hands its banner in rather than being imported a second time
+    if print_banner is not None:
+        print_banner()
+
+    ctx = multiprocessing.get_context("spawn")
+    progress_queue = ctx.Queue()
+    workers = [
+        ctx.Process(target=shard_worker, args=(i, shard_count, progress_queue), name=f"shard-{i}")
+        for i in range(shard_count)
+    ]
+    for worker in workers:
+        worker.start()
+    logger.info(f"{Fore.GREEN}[+] Started {shard_count} shard workers{Style.RESET_ALL}")
+
+    totals: Dict[int, Dict[str, int]] = {
+        i: {"accounts": 0, "cycles": 0, "succeeded": 0, "failed": 0, "skipped": 0} for i in range(shard_count)
+    }
+    interrupted = False
+    try:
+        while any(worker.is_alive() for worker in workers):
+            try:
+                message = progress_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            shard = message["shard"]
+            if message["type"] == "loaded":
+                totals[shard]["accounts"] = message["accounts"]
+            elif message["type"] == "summary":
+                totals[shard]["cycles"] += 1
+                for key in ("succeeded", "failed", "skipped"):
+                    totals[shard][key] += message["summary"][key]
+                overall = {key: sum(t[key] for t in totals.values()) for key in ("accounts", "succeeded", "failed", "skipped")}
+                logger.info(
+                    f"{Fore.CYAN}[*] Shard {shard} finished cycle {message['cycle']} │ all shards: "
+                    f"{overall['accounts']} accounts, {overall['succeeded']} succeeded, "
+                    f"{overall['failed']} failed, {overall['skipped']} skipped{Style.RESET_ALL}"
+                )
+            elif message["type"] == "fatal":
+                logger.error(f"{Fore.RED}[!] Shard {shard} hit an API-wide error: {message['message']}{Style.RESET_ALL}")
+                logger.error(f"{Fore.RED}[!] Stopping all shards{Style.RESET_ALL}")
+                break
+            elif message["type"] == "exited":
+                logger.info(f"{Fore.YELLOW}[*] Shard {shard} exited{Style.RESET_ALL}")
+    except KeyboardInterrupt:
+        interrupted = True
+        print(f"\n{Fore.YELLOW}[!] Script terminated by user, stopping shards...{Style.RESET_ALL}")
+    finally:
+        shutdown(workers, interrupted=interrupted)
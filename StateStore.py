@@ -0,0 +1,106 @@
+# StateStore.py
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set, Tuple
+
+def last_reset_at(reset_hour_utc: int, now: Optional[float] = None) -> float:
+    now_dt = datetime.fromtimestamp(now if now is not None else time.time(), tz=timezone.utc)
+    reset = now_dt.replace(hour=reset_hour_utc, minute=0, second=0, microsecond=0)
+    if reset > now_dt:
+        reset -= timedelta(days=1)
+    return reset.timestamp()
+
+class StateStore:
+    # Remembers what each account already finished so later cycles can skip it
+    def __init__(self, path: str, reset_hour_utc: int = 0):
+        self.path = path
+        self.reset_hour_utc = reset_hour_utc
+        # Shards of the multi-process runner share this file, so wait on locks
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # WAL stays consistent without an fsync per commit, only the last commits can be lost on power loss
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS steps ("
+            "account TEXT NOT NULL, step TEXT NOT NULL, outcome TEXT NOT NULL, updated_at REAL NOT NULL, "
+            "due_at REAL, PRIMARY KEY (account, step))"
+        )
+        # Databases from before due_at existed
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(steps)")}
+        if "due_at" not in columns:
+            try:
+                self.conn.execute("ALTER TABLE steps ADD COLUMN due_at REAL")
+            except sqlite3.OperationalError:
+                # Another shard added it first
+                pass
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS quests ("
+            "account TEXT NOT NULL, quest_type TEXT NOT NULL, quest_id TEXT NOT NULL, completed_at REAL NOT NULL, "
+            "PRIMARY KEY (account, quest_type, quest_id))"
+        )
+        self.conn.commit()
+        # Writes wait here until flush(), so an account run costs one transaction instead of one per quest
+        self._steps: Dict[Tuple[str, str], Tuple[str, float, Optional[float]]] = {}
+        self._quests: Dict[Tuple[str, str, str], float] = {}
+
+    def last_reset(self, now: Optional[float] = None) -> float:
+        return last_reset_at(self.reset_hour_utc, now)
+
+    def next_reset(self, now: Optional[float] = None) -> float:
+        return self.last_reset(now) + 86400
+
+    def record_step(self, account: str, step: str, outcome: str, due_at: Optional[float] = None):
+        # due_at is when the step can run again, if the API said so
+        self._steps[(account, step)] = (outcome, time.time(), due_at)
+
+    def get_step(self, account: str, step: str) -> Optional[tuple]:
+        if (account, step) in self._steps:
+            return self._steps[(account, step)]
+        return self.conn.execute(
+            "SELECT outcome, updated_at, due_at FROM steps WHERE account = ? AND step = ?",
+            (account, step)
+        ).fetchone()
+
+    def step_done(self, account: str, step: str, daily: bool = False) -> bool:
+        row = self.get_step(account, step)
+        if row is None or row[0] != "done":
+            return False
+        return not daily or row[1] >= self.last_reset()
+
+    def mark_quest_done(self, account: str, quest_type: str, quest_id):
+        self._quests[(account, quest_type, str(quest_id))] = time.time()
+
+    def completed_quests(self, account: str, quest_type: str) -> Set[str]:
+        # Daily quests come back after the reset, single quests stay done
+        since = self.last_reset() if quest_type == "daily" else 0
+        rows = self.conn.execute(
+            "SELECT quest_id FROM quests WHERE account = ? AND quest_type = ? AND completed_at >= ?",
+            (account, quest_type, since)
+        ).fetchall()
+        pending = {
+            quest_id for (quest_account, pending_type, quest_id), completed_at in self._quests.items()
+            if quest_account == account and pending_type == quest_type and completed_at >= since
+        }
+        return {row[0] for row in rows} | pending
+
+    def flush(self):
+        if not self._steps and not self._quests:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO steps (account, step, outcome, updated_at, due_at) VALUES (?, ?, ?, ?, ?)",
+                [(account, step, outcome, updated_at, due_at)
+                 for (account, step), (outcome, updated_at, due_at) in self._steps.items()]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO quests (account, quest_type, quest_id, completed_at) VALUES (?, ?, ?, ?)",
+                [(account, quest_type, quest_id, completed_at)
+                 for (account, quest_type, quest_id), completed_at in self._quests.items()]
+            )
+        self._steps.clear()
+        self._quests.clear()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
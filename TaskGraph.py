@@ -0,0 +1,132 @@
+# TaskGraph.py
+import asyncio
+import contextlib
+import logging
+from typing import Any, Awaitable, Callable, ContextManager, Dict, Optional, Tuple
+
+from colorama import Fore, Style
+
+logger = logging.getLogger(__name__)
+
+class _RaisedTimeout(Exception):
+    # Carries a TimeoutError raised by the step body itself (e.g. aiohttp's ServerTimeoutError)
+    # past the handler that is meant for the step's own deadline
+    def __init__(self, error: BaseException):
+        super().__init__(str(error))
+        self.error = error
+
+class Step:
+    def __init__(self, name: str, run: Callable[[], Awaitable[Any]], requires: Tuple[str, ...] = (),
+                 after: Tuple[str, ...] = (), timeout: Optional[float] = None,
+                 skip: Optional[Callable[[], bool]] = None):
+        self.name = name
+        self.run = run
+        # `requires` must finish as done or skipped, `after` only has to finish first
+        self.requires = tuple(requires)
+        self.after = tuple(after)
+        self.timeout = timeout
+        self.skip = skip
+
+class TaskGraph:
+    # Runs every step as soon as its dependencies allow, so independent steps overlap.
+    # Outcomes: done, skipped, failed (returned False or raised), timeout, blocked (a required step did not finish)
+    def __init__(self, span: Optional[Callable[..., ContextManager[dict]]] = None,
+                 fatal: Optional[Callable[[BaseException], bool]] = None):
+        # Optional span factory, called as span(step_name, "step") around every step that runs
+        self.span = span
+        # Exceptions for which `fatal` is true stop the whole graph and are re-raised from run()
+        self.fatal = fatal
+        self.steps: Dict[str, Step] = {}
+        self.outcomes: Dict[str, str] = {}
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, BaseException] = {}
+
+    def add(self, name: str, run: Callable[[], Awaitable[Any]], requires: Tuple[str, ...] = (),
+            after: Tuple[str, ...] = (), timeout: Optional[float] = None,
+            skip: Optional[Callable[[], bool]] = None):
+        if name in self.steps:
+            raise ValueError(f"Duplicate step: {name}")
+        self.steps[name] = Step(name, run, requires, after, timeout, skip)
+
+    async def _run_step(self, step: Step) -> str:
+        with self.span(step.name, "step") if self.span else contextlib.nullcontext({}) as span_args:
+            outcome = await self._execute(step)
+            span_args["outcome"] = outcome
+            return outcome
+
+    @staticmethod
+    async def _call(step: Step) -> Any:
+        try:
+            return await step.run()
+        except asyncio.TimeoutError as e:
+            raise _RaisedTimeout(e) from e
+
+    async def _execute(self, step: Step) -> str:
+        try:
+            if step.timeout:
+                result = await asyncio.wait_for(self._call(step), step.timeout)
+            else:
+                result = await self._call(step)
+        except asyncio.TimeoutError:
+            logger.error(f"{Fore.RED}[!] Step {step.name} timed out after {step.timeout}s{Style.RESET_ALL}")
+            return "timeout"
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            if isinstance(e, _RaisedTimeout):
+                e = e.error
+            # Caught inside the step's task: asyncio would re-raise SystemExit and
+            # KeyboardInterrupt straight out of the event loop, past the caller's handlers
+            self.errors[step.name] = e
+            if isinstance(e, Exception) and not (self.fatal and self.fatal(e)):
+                logger.error(f"{Fore.RED}[!] Step {step.name} failed: {e}{Style.RESET_ALL}")
+            return "failed"
+        self.results[step.name] = result
+        return "failed" if result is False else "done"
+
+    def _start_ready(self, pending: Dict[str, Step], running: Dict[asyncio.Task, str]):
+        # Skipped and blocked steps resolve immediately and may unblock others, so repeat until stable
+        progressed = True
+        while progressed:
+            progressed = False
+            for name, step in list(pending.items()):
+                if any(dep not in self.outcomes for dep in step.requires + step.after):
+                    continue
+                del pending[name]
+                progressed = True
+                if any(self.outcomes[dep] not in ("done", "skipped") for dep in step.requires):
+                    self.outcomes[name] = "blocked"
+                elif step.skip is not None and step.skip():
+                    self.outcomes[name] = "skipped"
+                else:
+                    running[asyncio.create_task(self._run_step(step))] = name
+
+    async def run(self) -> Dict[str, str]:
+        for step in self.steps.values():
+            for dep in step.requires + step.after:
+                if dep not in self.steps:
+                    raise ValueError(f"Step {step.name} depends on unknown step {dep}")
+
+        pending = dict(self.steps)
+        running: Dict[asyncio.Task, str] = {}
+        try:
+            while True:
+                self._start_ready(pending, running)
+                if not running:
+                    if pending:
+                        raise ValueError(f"Dependency cycle between steps: {', '.join(pending)}")
+                    return self.outcomes
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    name = running.pop(task)
+                    self.outcomes[name] = task.result()
+                    # A failed step only affects its dependents, unless it cannot be handled
+                    # locally; then the remaining steps are cancelled and it is re-raised here
+                    error = self.errors.get(name)
+                    if error is not None and (not isinstance(error, Exception) or (self.fatal and self.fatal(error))):
+                        raise error
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
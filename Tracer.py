@@ -0,0 +1,131 @@
+# Tracer.py
+import asyncio
+import contextlib
+import functools
+import inspect
+import itertools
+import json
+import os
+import time
+import weakref
+from typing import Dict, List, Optional
+
+from LogPipeline import account_context
+
+class Tracer:
+    # Collects spans as Chrome trace events; open the file in ui.perfetto.dev or chrome://tracing.
+    # Each asyncio task gets its own track so spans on one track always nest properly
+    def __init__(self, path: str, process_name: str = "memeswar", max_events: int = 200000):
+        self.path = path
+        self.process_name = process_name
+        self.max_events = max_events
+        self.started = time.perf_counter()
+        self.pid = os.getpid()
+        self._next_tid = itertools.count(1)
+        self._accounts: Dict[str, int] = {}
+        self._reset()
+
+    def _reset(self):
+        self.dropped = 0
+        self.events: List[Dict] = [
+            {"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": self.process_name}},
+        ]
+        # Track names are metadata events, so every new buffer names its tracks again
+        self._tids: "weakref.WeakKeyDictionary[asyncio.Task, int]" = weakref.WeakKeyDictionary()
+
+    @property
+    def empty(self) -> bool:
+        return len(self.events) <= 1 and not self.dropped
+
+    def _tid(self) -> Optional[int]:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        if task is None:
+            return 0
+        tid = self._tids.get(task)
+        if tid is None:
+            # Naming a track takes two metadata events, which count against max_events too
+            if len(self.events) + 3 > self.max_events:
+                return None
+            tid = self._tids[task] = next(self._next_tid)
+            account = account_context.get() or "-"
+            # Keep every track of one account next to each other in the viewer
+            order = self._accounts.setdefault(account, len(self._accounts))
+            self.events.append({
+                "name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                "args": {"name": f"{account} {task.get_name()}"},
+            })
+            self.events.append({
+                "name": "thread_sort_index", "ph": "M", "pid": self.pid, "tid": tid,
+                "args": {"sort_index": order * 100000 + tid},
+            })
+        return tid
+
+    def record(self, name: str, cat: str, started: float, ended: float, **args):
+        tid = self._tid() if len(self.events) < self.max_events else None
+        if tid is None:
+            self.dropped += 1
+            return
+        account = account_context.get()
+        if account:
+            args["account"] = account
+        self.events.append({
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": round((started - self.started) * 1e6, 1),
+            "dur": round((ended - started) * 1e6, 1),
+            "pid": self.pid,
+            "tid": tid,
+            "args": args,
+        })
+
+    @contextlib.contextmanager
+    def span(self, name: str, cat: str = "step", **args):
+        # Callers can add to the yielded args, e.g. a status only known at the end
+        started = time.perf_counter()
+        try:
+            yield args
+        except BaseException as e:
+            args["error"] = type(e).__name__
+            raise
+        finally:
+            self.record(name, cat, started, time.perf_counter(), **args)
+
+    def instrument(self, cls):
+        # Wrap every public coroutine method of cls in a span
+        for name, method in list(vars(cls).items()):
+            if name.startswith("_") or not inspect.iscoroutinefunction(method) or hasattr(method, "__traced__"):
+                continue
+            setattr(cls, name, self._wrap(f"{cls.__name__}.{name}", method))
+
+    def _wrap(self, span_name: str, method):
+        @functools.wraps(method)
+        async def traced(*args, **kwargs):
+            with self.span(span_name, "method"):
+                return await method(*args, **kwargs)
+        traced.__traced__ = True
+        return traced
+
+    def flush(self) -> Dict:
+        # Hands over everything recorded so far and starts an empty buffer,
+        # so each written file covers one stretch of the run and the cap applies per file
+        document = {
+            "traceEvents": self.events,
+            "displayTimeUnit": "ms",
+            "otherData": {"dropped_events": self.dropped},
+        }
+        self._reset()
+        return document
+
+    @staticmethod
+    def dump(document: Dict, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(document, file)
+        os.replace(tmp_path, path)
+
+    def write(self, path: Optional[str] = None):
+        self.dump(self.flush(), path or self.path)
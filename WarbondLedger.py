@@ -0,0 +1,39 @@
+# WarbondLedger.py
+from typing import Optional
+
+class WarbondLedger:
+    # Local warbond balance kept up to date from reward amounts in API responses
+    def __init__(self):
+        self.balance: Optional[int] = None
+        self.stale = True
+
+    @property
+    def needs_reconcile(self) -> bool:
+        return self.balance is None or self.stale
+
+    @staticmethod
+    def parse_amount(amount) -> Optional[int]:
+        try:
+            return int(float(str(amount).replace(",", "")))
+        except (TypeError, ValueError):
+            return None
+
+    def reconcile(self, balance) -> int:
+        self.balance = self.parse_amount(balance) or 0
+        self.stale = False
+        return self.balance
+
+    def credit(self, amount):
+        # Unknown amounts are not guessed, the next settle re-reads /user instead
+        parsed = self.parse_amount(amount)
+        if parsed is None or self.balance is None:
+            self.stale = True
+            return
+        self.balance += parsed
+
+    def debit(self, amount: int):
+        if self.balance is not None:
+            self.balance = max(0, self.balance - amount)
+
+    def mark_stale(self):
+        self.stale = True
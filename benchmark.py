@@ -0,0 +1,256 @@
+import argparse
+import asyncio
+import contextlib
+import functools
+import io
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+from typing import Dict, List
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import main
+from main import MemesWarAPI, encode_init_data
+from Metrics import Metrics
+from mock_server import MockMemesWarServer
+from RateLimiter import RateLimiter
+from StateStore import StateStore
+
+TIMED_METHODS = (
+    "validate_endpoint",
+    "get_user_info",
+    "daily_checkin",
+    "use_referral_code",
+    "get_quests",
+    "quest_progress",
+    "claim_quest",
+    "claim_treasury",
+    "send_warbonds",
+    "process_account",
+)
+
+# Runs in a fresh interpreter so nothing is already imported or cached
+STARTUP_PROBE = """
+import time
+started = time.perf_counter()
+import asyncio, json, sys
+import main
+imported = time.perf_counter()
+
+async def first_request():
+    async with main.MemesWarAPI(sys.argv[1]) as api:
+        await api.get_user_info(print_info=False)
+
+asyncio.run(first_request())
+print(json.dumps({"import_s": imported - started, "first_request_s": time.perf_counter() - started}))
+"""
+
+def synthetic_accounts(count: int) -> List[str]:
+    accounts = []
+    for i in range(count):
+        user = json.dumps({"id": 9000000 + i, "first_name": f"bench{i}", "username": f"bench{i}"})
+        raw = f"query_id=BENCH{i}&user={urllib.parse.quote(user)}&auth_date={int(time.time())}&hash={i:064x}"
+        accounts.append(encode_init_data(raw))
+    return accounts
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+@contextlib.contextmanager
+def timed_methods(samples: Dict[str, List[float]]):
+    originals = {name: getattr(MemesWarAPI, name) for name in TIMED_METHODS}
+
+    def wrap(name, method):
+        @functools.wraps(method)
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                samples.setdefault(name, []).append(time.perf_counter() - started)
+        return timed
+
+    for name, method in originals.items():
+        setattr(MemesWarAPI, name, wrap(name, method))
+    try:
+        yield
+    finally:
+        for name, method in originals.items():
+            setattr(MemesWarAPI, name, method)
+
+async def run_benchmark(args) -> Dict:
+    server = MockMemesWarServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                verify_delay=args.verify_delay, throttle_rate=args.throttle_rate)
+    base_url = await server.start()
+    accounts = synthetic_accounts(args.accounts)
+
+    state_dir = tempfile.mkdtemp(prefix="memeswar-bench-")
+    main.EXPECTED_BASE_URL = base_url
+    main.MAX_CONCURRENT_ACCOUNTS = args.concurrency
+    main.rate_limiter = RateLimiter(args.rps)
+    main.endpoint_health.clear()
+    main.retry_policy.clear()
+    main.quest_catalog.clear()
+    main.metrics = Metrics()
+    main._state_store = StateStore(os.path.join(state_dir, "state.db"))
+    if args.trace_path:
+        main.enable_tracing(args.trace_path)
+
+    results = {"accounts": args.accounts, "concurrency": args.concurrency, "rps": args.rps, "passes": []}
+    try:
+        for cycle in range(1, args.cycles + 1):
+            samples: Dict[str, List[float]] = {}
+            requests_before = server.request_count
+            started = time.perf_counter()
+            with timed_methods(samples), contextlib.redirect_stdout(io.StringIO()):
+                summary = await main.run_cycle(accounts)
+            elapsed = time.perf_counter() - started
+            await main.write_cycle_trace(cycle)
+            requests = server.request_count - requests_before
+
+            results["passes"].append({
+                "cycle": cycle,
+                "elapsed_s": round(elapsed, 3),
+                "accounts_per_minute": round(args.accounts / elapsed * 60, 2) if elapsed else 0.0,
+                "requests": requests,
+                "requests_per_account": round(requests / args.accounts, 2),
+                "summary": summary,
+                "steps": {
+                    name: {
+                        "count": len(values),
+                        "p50_ms": round(percentile(values, 50) * 1000, 2),
+                        "p95_ms": round(percentile(values, 95) * 1000, 2),
+                        "p99_ms": round(percentile(values, 99) * 1000, 2),
+                    }
+                    for name, values in sorted(samples.items())
+                },
+            })
+    finally:
+        main.write_trace()
+        await main.close_connector()
+        main._state_store.close()
+        main._state_store = None
+        shutil.rmtree(state_dir, ignore_errors=True)
+        await server.stop()
+
+    results["status_counts"] = {str(status): count for status, count in sorted(server.status_counts.items())}
+    results["sleeps"] = main.metrics.to_dict()["sleeps"]
+    results["retries"] = dict(main.metrics.retry_counts)
+    results["peak_rss_mb"] = round(peak_rss_mb(), 2)
+    return results
+
+async def run_startup_probe(base_url: str, account: str) -> Dict[str, float]:
+    env = dict(os.environ, MEMESWAR_BASE_URL=base_url)
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", STARTUP_PROBE, account,
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    stdout, _ = await process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"startup probe exited with {process.returncode}")
+    return json.loads(stdout.decode().strip().splitlines()[-1])
+
+async def run_startup_benchmark(args) -> Dict:
+    server = MockMemesWarServer(latency=args.latency, jitter=args.jitter)
+    base_url = await server.start()
+    account = synthetic_accounts(1)[0]
+    try:
+        probes = [await run_startup_probe(base_url, account) for _ in range(args.startup_runs)]
+    finally:
+        await server.stop()
+
+    construction = {}
+    for count in (1, 10, 100, 1000):
+        started = time.perf_counter()
+        for _ in range(count):
+            MemesWarAPI(account)
+        construction[str(count)] = round((time.perf_counter() - started) / count * 1000, 3)
+
+    return {
+        "runs": args.startup_runs,
+        "import_ms": {
+            "p50": round(percentile([p["import_s"] for p in probes], 50) * 1000, 1),
+            "max": round(max(p["import_s"] for p in probes) * 1000, 1),
+        },
+        "first_request_ms": {
+            "p50": round(percentile([p["first_request_s"] for p in probes], 50) * 1000, 1),
+            "max": round(max(p["first_request_s"] for p in probes) * 1000, 1),
+        },
+        "construction_ms_per_instance": construction,
+    }
+
+def print_startup_results(results: Dict):
+    print(f"\n[+] Startup over {results['runs']} fresh interpreters")
+    print(f"[*] import main: p50 {results['import_ms']['p50']} ms │ max {results['import_ms']['max']} ms")
+    print(f"[*] Time to first request: p50 {results['first_request_ms']['p50']} ms │ max {results['first_request_ms']['max']} ms")
+    for count, per_instance in results["construction_ms_per_instance"].items():
+        print(f"[*] MemesWarAPI() x{count}: {per_instance} ms per instance")
+
+def print_results(results: Dict):
+    print(f"\n[+] {results['accounts']} accounts │ concurrency {results['concurrency']} │ {results['rps']} req/s cap")
+    for cycle in results["passes"]:
+        summary = cycle["summary"]
+        print(f"\n╭── Pass #{cycle['cycle']} ───")
+        print(f"│ Wall time: {cycle['elapsed_s']}s │ Accounts/min: {cycle['accounts_per_minute']}")
+        print(f"│ Requests: {cycle['requests']} │ Per account: {cycle['requests_per_account']}")
+        print(f"│ Succeeded: {summary['succeeded']} │ Failed: {summary['failed']} │ Skipped: {summary['skipped']}")
+        print(f"│ {'step':<20}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, step in cycle["steps"].items():
+            print(f"│ {name:<20}{step['count']:>7}{step['p50_ms']:>10}{step['p95_ms']:>10}{step['p99_ms']:>10}")
+        print(f"╰{'─' * 30}")
+    print(f"[*] Status codes: {results['status_counts']}")
+    print(f"[*] Deliberate sleeps: {results['sleeps']}")
+    print(f"[*] Retries: {results['retries']}")
+    print(f"[*] Peak RSS: {results['peak_rss_mb']} MB")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="End-to-end throughput benchmark against the local mock server")
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--cycles", type=int, default=2, help="full passes over all accounts")
+    parser.add_argument("--concurrency", type=int, default=main.MAX_CONCURRENT_ACCOUNTS)
+    parser.add_argument("--rps", type=float, default=0, help="global request rate cap, 0 disables")
+    parser.add_argument("--latency", type=float, default=0.02, help="server latency per request (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--verify-delay", type=float, default=3.0)
+    parser.add_argument("--json", dest="json_path", help="also write results to this file")
+    parser.add_argument("--trace", dest="trace_path", help="write a Chrome/Perfetto trace of every pass, as <name>.cycleN<ext> next to this path")
+    parser.add_argument("--verbose", action="store_true", help="keep the bot's own log output")
+    parser.add_argument("--startup", action="store_true", help="measure import time and time to first request instead")
+    parser.add_argument("--startup-runs", type=int, default=5, help="fresh interpreters to start with --startup")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not args.verbose:
+        logging.getLogger(main.__name__).setLevel(logging.CRITICAL)
+    if args.startup:
+        results = asyncio.run(run_startup_benchmark(args))
+        print_startup_results(results)
+    else:
+        results = asyncio.run(run_benchmark(args))
+        print_results(results)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
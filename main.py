@@ -1,22 +1,274 @@
 import aiohttp
 import asyncio
+import contextlib
 import json
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Set
 import logging
 from datetime import datetime
 from colorama import init, Fore, Back, Style
 import urllib.parse
 import time
-from APIEndpointError import APIEndpointError
-from CONFIG import GUILD_ID, REFERRAL_CODE
-from fake_useragent import UserAgent
+import re
+import hashlib
+import os
+import random
+from APIEndpointError import APIEndpointError, AuthenticationError, EndpointUnavailableError, CircuitOpenError
+from RateLimiter import RateLimiter
+from RetryPolicy import RetryPolicy, RETRYABLE_STATUSES, IDEMPOTENT_METHODS, parse_retry_after
+from EndpointHealth import EndpointHealth
+from QuestCatalog import QuestCatalog
+from StateStore import StateStore
+from Checkpoint import CycleCheckpoint
+from Scheduler import DeadlineScheduler
+from TaskGraph import TaskGraph
+from Tracer import Tracer
+from Metrics import Metrics
+from AccountSource import AccountSource
+from LogPipeline import setup_logging, account_context
+from WarbondLedger import WarbondLedger
+from Models import UserInfo, QuestInfo, QuestProgress, TreasuryReward, read_json, set_json_backend
+from CONFIG import (
+    GUILD_ID, REFERRAL_CODE,
+    CONNECTION_LIMIT, CONNECTION_LIMIT_PER_HOST, KEEPALIVE_TIMEOUT, DNS_CACHE_TTL,
+    MAX_CONCURRENT_ACCOUNTS, MAX_REQUESTS_PER_SECOND, ENDPOINT_HEALTH_TTL,
+    STATE_DB, DAILY_RESET_HOUR_UTC, CHECKPOINT_FILE,
+    TREASURY_INTERVAL, QUEST_REFRESH_INTERVAL, QUEST_CATALOG_TTL, TASK_RETRY_DELAY, SCHEDULER_BATCH_WINDOW,
+    METRICS_FILE, METRICS_FLUSH_INTERVAL, METRICS_PORT, TRACE_FILE, TRACE_MAX_EVENTS, SHARDS, LOG_FORMAT, JSON_BACKEND, USER_AGENT_POOL_SIZE,
+    QUEST_CONCURRENCY, QUEST_VERIFY_DELAY, QUEST_VERIFY_POLLS, STEP_TIMEOUTS,
+    RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY, BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT
+)
 
 init()
 
-logging.basicConfig(level=logging.INFO, format='%(message)s')
+setup_logging(LOG_FORMAT)
+set_json_backend(JSON_BACKEND)
 logger = logging.getLogger(__name__)
 
-EXPECTED_BASE_URL = "https://memes-war.memecore.com/api"
+EXPECTED_BASE_URL = os.environ.get("MEMESWAR_BASE_URL", "https://memes-war.memecore.com/api")
+ACCOUNT_TASKS = ("checkin", "referral", "quests", "treasury")
+ENDPOINT_MAP = {
+    "user": "/user",
+    "daily_quests": "/quest/daily/list",
+    "single_quests": "/quest/single/list",
+    "daily_checkin": "/quest/check-in", 
+    "treasury": "/quest/treasury",
+    "guild_warbond": "/guild/warbond",
+    "referral": "/user/referral/{code}",
+    "daily_progress": "/quest/daily/{quest_id}/progress",
+    "single_progress": "/quest/single/{quest_id}/progress",
+    "daily_claim": "/quest/daily/{quest_id}/claim",
+    "single_claim": "/quest/single/{quest_id}/claim"
+}
+ENDPOINT_PATTERNS = [
+    (key, re.compile(".*" + re.sub(r"\\\{\w+\\\}", "[^/]+", re.escape(path)) + "$"))
+    for key, path in ENDPOINT_MAP.items()
+]
+
+_connector: Optional[aiohttp.TCPConnector] = None
+rate_limiter = RateLimiter(MAX_REQUESTS_PER_SECOND)
+endpoint_health = EndpointHealth(ENDPOINT_HEALTH_TTL)
+quest_catalog = QuestCatalog(QUEST_CATALOG_TTL, DAILY_RESET_HOUR_UTC)
+retry_policy = RetryPolicy(RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+                           BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT)
+_state_store: Optional[StateStore] = None
+_checkpoint: Optional[CycleCheckpoint] = None
+_user_agents: List[str] = []
+metrics = Metrics()
+metrics_file = METRICS_FILE
+metrics_port = METRICS_PORT
+checkpoint_file = CHECKPOINT_FILE
+trace_file = TRACE_FILE
+tracer: Optional[Tracer] = None
+
+SHARD_INDEX = 0
+SHARD_COUNT = 1
+_progress_queue = None
+
+def configure_shard(shard_index: int, shard_count: int, progress_queue=None):
+    # Called in each worker process of the sharded runner before run()
+    global SHARD_INDEX, SHARD_COUNT, _progress_queue, metrics_file, metrics_port, checkpoint_file, trace_file, rate_limiter
+    SHARD_INDEX = shard_index
+    SHARD_COUNT = shard_count
+    # Every shard paces itself, so each gets an equal slice of the global request cap
+    rate_limiter = RateLimiter(MAX_REQUESTS_PER_SECOND / shard_count)
+    _progress_queue = progress_queue
+    if METRICS_FILE:
+        root, ext = os.path.splitext(METRICS_FILE)
+        metrics_file = f"{root}.shard{shard_index}{ext}"
+    if METRICS_PORT:
+        metrics_port = METRICS_PORT + shard_index
+    if CHECKPOINT_FILE:
+        root, ext = os.path.splitext(CHECKPOINT_FILE)
+        checkpoint_file = f"{root}.shard{shard_index}{ext}"
+    if TRACE_FILE:
+        root, ext = os.path.splitext(TRACE_FILE)
+        trace_file = f"{root}.shard{shard_index}{ext}"
+    setup_logging(LOG_FORMAT, shard=shard_index)
+
+def in_shard(account_key: str) -> bool:
+    if SHARD_COUNT <= 1:
+        return True
+    return int(hashlib.sha1(account_key.encode()).hexdigest()[:8], 16) % SHARD_COUNT == SHARD_INDEX
+
+def report_progress(kind: str, **fields):
+    if _progress_queue is not None:
+        _progress_queue.put({"type": kind, "shard": SHARD_INDEX, **fields})
+
+def resolve_endpoint_key(path: str) -> str:
+    for key, pattern in ENDPOINT_PATTERNS:
+        if pattern.match(path):
+            return key
+    return "other"
+
+def enable_tracing(path: str) -> Tracer:
+    # Opt-in: spans for every MemesWarAPI method, HTTP request, graph step and sleep
+    global tracer
+    tracer = Tracer(path, f"memeswar shard {SHARD_INDEX}", TRACE_MAX_EVENTS)
+    tracer.instrument(MemesWarAPI)
+    return tracer
+
+def cycle_trace_path(cycle: int) -> str:
+    root, ext = os.path.splitext(tracer.path)
+    return f"{root}.cycle{cycle}{ext}"
+
+async def write_cycle_trace(cycle: int):
+    # One file per cycle, serialised off the event loop; the buffer starts empty again afterwards
+    if tracer is None:
+        return
+    path = cycle_trace_path(cycle)
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, Tracer.dump, tracer.flush(), path)
+    except OSError as e:
+        logger.error(f"{Fore.RED}[!] Could not write {path}: {e}{Style.RESET_ALL}")
+
+def write_trace():
+    # Whatever was recorded after the last finished cycle, e.g. one cut short by a shutdown
+    if tracer is None or tracer.empty:
+        return
+    try:
+        tracer.write()
+    except OSError as e:
+        logger.error(f"{Fore.RED}[!] Could not write {tracer.path}: {e}{Style.RESET_ALL}")
+
+async def pause(seconds: float, reason: str):
+    # Deliberate sleeps go through here so metrics can tell them apart from network time
+    metrics.record_sleep(reason, seconds)
+    if tracer is None:
+        await asyncio.sleep(seconds)
+        return
+    with tracer.span(f"sleep {reason}", "sleep", reason=reason, seconds=round(seconds, 3)):
+        await asyncio.sleep(seconds)
+
+async def _on_request_start(session, trace_config_ctx, params):
+    waiting_since = time.perf_counter()
+    await rate_limiter.acquire()
+    trace_config_ctx.endpoint_key = resolve_endpoint_key(params.url.path)
+    trace_config_ctx.started = time.perf_counter()
+    if tracer is not None and trace_config_ctx.started - waiting_since > 0.001:
+        tracer.record("sleep rate_limit", "sleep", waiting_since, trace_config_ctx.started,
+                      reason="rate_limit", endpoint=trace_config_ctx.endpoint_key)
+
+async def _on_request_end(session, trace_config_ctx, params):
+    ended = time.perf_counter()
+    metrics.observe_request(trace_config_ctx.endpoint_key, params.response.status, ended - trace_config_ctx.started)
+    if tracer is not None:
+        tracer.record(f"{params.method} {trace_config_ctx.endpoint_key}", "http", trace_config_ctx.started, ended,
+                      endpoint=trace_config_ctx.endpoint_key, status=params.response.status, url=str(params.url.path))
+
+async def _on_request_exception(session, trace_config_ctx, params):
+    ended = time.perf_counter()
+    error = type(params.exception).__name__
+    metrics.observe_error(trace_config_ctx.endpoint_key, error, ended - trace_config_ctx.started)
+    if tracer is not None:
+        tracer.record(f"{params.method} {trace_config_ctx.endpoint_key}", "http", trace_config_ctx.started, ended,
+                      endpoint=trace_config_ctx.endpoint_key, error=error, url=str(params.url.path))
+
+async def _on_request_chunk_sent(session, trace_config_ctx, params):
+    metrics.add_bytes(trace_config_ctx.endpoint_key, sent=len(params.chunk))
+
+async def _on_response_chunk_received(session, trace_config_ctx, params):
+    metrics.add_bytes(trace_config_ctx.endpoint_key, received=len(params.chunk))
+
+def get_trace_configs() -> List[aiohttp.TraceConfig]:
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_request_end.append(_on_request_end)
+    trace_config.on_request_exception.append(_on_request_exception)
+    trace_config.on_request_chunk_sent.append(_on_request_chunk_sent)
+    trace_config.on_response_chunk_received.append(_on_response_chunk_received)
+    return [trace_config]
+
+async def flush_metrics_periodically():
+    while True:
+        await asyncio.sleep(METRICS_FLUSH_INTERVAL)
+        try:
+            metrics.write_json(metrics_file)
+        except OSError as e:
+            logger.error(f"{Fore.RED}[!] Could not write {metrics_file}: {e}{Style.RESET_ALL}")
+
+async def start_metrics_server(port: int) -> "aiohttp.web.AppRunner":
+    from aiohttp import web
+
+    async def handle_metrics(request):
+        return web.Response(text=metrics.render_prometheus(), content_type="text/plain")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port).start()
+    logger.info(f"{Fore.GREEN}[+] Metrics available at http://0.0.0.0:{port}/metrics{Style.RESET_ALL}")
+    return runner
+
+def get_connector() -> aiohttp.TCPConnector:
+    # One pooled connector per process so every account reuses warm connections
+    global _connector
+    if _connector is None or _connector.closed:
+        _connector = aiohttp.TCPConnector(
+            limit=CONNECTION_LIMIT,
+            limit_per_host=CONNECTION_LIMIT_PER_HOST,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            use_dns_cache=True
+        )
+    return _connector
+
+async def close_connector():
+    global _connector
+    if _connector is not None and not _connector.closed:
+        await _connector.close()
+    _connector = None
+
+def random_user_agent() -> str:
+    # fake_useragent loads its dataset on construction and every .random costs
+    # a few ms, so sample a pool once per process and share it between accounts
+    if not _user_agents:
+        from fake_useragent import UserAgent
+        ua = UserAgent()
+        _user_agents.extend(ua.random for _ in range(max(1, USER_AGENT_POOL_SIZE)))
+    return random.choice(_user_agents)
+
+def get_state_store() -> StateStore:
+    global _state_store
+    if _state_store is None:
+        _state_store = StateStore(STATE_DB, DAILY_RESET_HOUR_UTC)
+    return _state_store
+
+def get_checkpoint() -> CycleCheckpoint:
+    global _checkpoint
+    if _checkpoint is None:
+        _checkpoint = CycleCheckpoint(checkpoint_file)
+    return _checkpoint
+
+def get_account_key(init_data: str) -> str:
+    # Telegram user id survives init data refreshes, the raw string does not
+    decoded = init_data
+    for _ in range(3):
+        decoded = urllib.parse.unquote(decoded)
+    match = re.search(r'"id"\s*:\s*(\d+)', decoded)
+    if match:
+        return match.group(1)
+    return hashlib.sha1(init_data.encode()).hexdigest()
 
 def encode_init_data(raw_init_data: str) -> str:
     decoded = urllib.parse.unquote(raw_init_data)
@@ -37,40 +289,24 @@ def encode_init_data(raw_init_data: str) -> str:
     
     return '%26'.join(encoded_pairs)
 
-def read_accounts() -> List[str]:
+def read_accounts(source: Optional[AccountSource] = None) -> Dict[str, str]:
+    source = source or AccountSource('data.txt', encode_init_data, get_account_key)
     try:
-        with open('data.txt', 'r', encoding='utf-8') as file:
-            raw_accounts = file.readlines()
-        
-        accounts = [encode_init_data(line.strip()) for line in raw_accounts if line.strip()]
+        accounts = source.load()
         logger.info(f"{Fore.GREEN}[+] Loaded {len(accounts)} accounts{Style.RESET_ALL}")
         return accounts
     except FileNotFoundError:
         logger.error(f"{Fore.RED}[!] data.txt not found{Style.RESET_ALL}")
-        return []
+        return {}
     except Exception as e:
         logger.error(f"{Fore.RED}[!] Error reading data.txt: {e}{Style.RESET_ALL}")
-        return []
+        return {}
 
 class MemesWarAPI:
     def __init__(self, telegram_init_data: str):
         self.base_url = EXPECTED_BASE_URL
-        self.max_retries = 3
-        self.endpoint_map = {
-            "user": "/user",
-            "daily_quests": "/quest/daily/list",
-            "single_quests": "/quest/single/list",
-            "daily_checkin": "/quest/check-in", 
-            "treasury": "/quest/treasury",
-            "guild_warbond": "/guild/warbond",
-            "referral": "/user/referral/{code}",
-            "daily_progress": "/quest/daily/{quest_id}/progress",
-            "single_progress": "/quest/single/{quest_id}/progress",
-            "daily_claim": "/quest/daily/{quest_id}/claim",
-            "single_claim": "/quest/single/{quest_id}/claim"
-        }
-        ua = UserAgent()
-        random_ua = ua.random
+        self.endpoint_map = dict(ENDPOINT_MAP)
+        random_ua = random_user_agent()
         
         self.headers = {
             "accept": "*/*",
@@ -88,8 +324,95 @@ class MemesWarAPI:
         self.cookies = {
             "telegramInitData": telegram_init_data
         }
+        self.account_key = get_account_key(telegram_init_data)
+        self.ledger = WarbondLedger()
+        self._quest_rewards: Dict[tuple, str] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                cookies=self.cookies,
+                connector=get_connector(),
+                connector_owner=False,
+                trace_configs=get_trace_configs()
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @contextlib.asynccontextmanager
+    async def request(self, method: str, endpoint_key: str, path: str, **kwargs):
+        response = await self.send_with_retry(method, endpoint_key, path, **kwargs)
+        try:
+            yield response
+        finally:
+            response.release()
+
+    async def send_with_retry(self, method: str, endpoint_key: str, path: str, **kwargs) -> aiohttp.ClientResponse:
+        # Every API call goes through here. Retryable failures back off with decorrelated
+        # jitter, and the endpoint's breaker and Retry-After pause are shared by all accounts.
+        # Once attempts run out the last response is returned for the caller to handle.
+        breaker = retry_policy.breaker(endpoint_key)
+        session = await self.get_session()
+        delay = None
+        attempt = 1
+        while True:
+            wait = breaker.retry_in()
+            if wait > retry_policy.max_delay:
+                raise CircuitOpenError(f"{endpoint_key} is rate limited for another {wait:.0f}s")
+            if wait > 0:
+                await pause(wait, "retry_after")
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit breaker open for {endpoint_key}")
+
+            try:
+                response = await session.request(method, f"{self.base_url}{path}", **kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                breaker.record_failure()
+                # A POST may already have reached the server, only resend it if the connection never opened
+                if attempt >= retry_policy.max_attempts or not is_safe_to_resend(method, e):
+                    raise
+                retry_after, throttled = None, False
+            except BaseException:
+                # Cancelled (step timeout, Ctrl-C) or failed oddly: never leave a half-open probe pending
+                breaker.release()
+                raise
+            else:
+                if response.status not in RETRYABLE_STATUSES:
+                    breaker.record_success()
+                    return response
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                throttled = response.status == 429
+                if throttled:
+                    breaker.record_throttle()
+                else:
+                    breaker.record_failure()
+                if attempt >= retry_policy.max_attempts:
+                    return response
+                response.release()
+
+            delay = retry_policy.next_delay(delay)
+            metrics.record_retry(endpoint_key)
+            attempt += 1
+            if retry_after is not None or throttled:
+                # Shared, so the other accounts wait for it too before their next request
+                breaker.block(retry_after if retry_after is not None else delay)
+            else:
+                await pause(delay, "retry_backoff")
                 
-    def print_banner(self):
+    @staticmethod
+    def print_banner():
         banner = f"""{Fore.CYAN}
     ┏━━━━┳┓╋╋╋╋╋┏━━━┓╋╋╋┏┓╋╋╋╋╋┏━━━┓╋╋┏┓╋╋╋╋╋┏━┓    awkowakwoakowa
     ┃┏┓┏┓┃┃╋╋╋╋╋┃┏━┓┃╋╋╋┃┃╋╋╋╋╋┃┏━┓┃╋╋┃┃╋╋╋╋╋┃┏┛    created by @yogschannel
@@ -101,119 +424,173 @@ class MemesWarAPI:
     """
         print(banner)
 
-    async def get_quests(self, quest_type: str = "daily") -> List[Dict]:
+    async def get_quests(self, quest_type: str = "daily") -> Optional[List[QuestInfo]]:
+        # None when the list could not be fetched, an empty list only for an empty catalog
         endpoint_key = "daily_quests" if quest_type == "daily" else "single_quests"
         try:
-            await self.validate_endpoint(endpoint_key)
-            endpoint = self.endpoint_map[endpoint_key]
-            
-            async with aiohttp.ClientSession(headers=self.headers, cookies=self.cookies) as session:
-                async with session.get(f"{self.base_url}{endpoint}") as response:
+            cached = quest_catalog.get(quest_type)
+            if cached is not None:
+                logger.info(f"{Fore.BLUE}[*] Using {len(cached)} cached {quest_type} quests{Style.RESET_ALL}")
+                return cached
+
+            async with quest_catalog.lock(quest_type):
+                # Another account may have fetched the list while we waited
+                cached = quest_catalog.get(quest_type)
+                if cached is not None:
+                    logger.info(f"{Fore.BLUE}[*] Using {len(cached)} cached {quest_type} quests{Style.RESET_ALL}")
+                    return cached
+
+                await self.validate_endpoint(endpoint_key)
+                endpoint = self.endpoint_map[endpoint_key]
+
+                async with self.request("GET", endpoint_key, endpoint) as response:
+                    self.check_endpoint_status(endpoint_key, response.status)
                     if response.status == 200:
-                        data = await response.json()
-                        quests = data.get("data", {}).get("quests", [])
-                        quest_info = [{"id": quest["id"], "type": quest["type"], "title": quest["title"]} 
-                                    for quest in quests]
+                        quest_info = QuestInfo.list_from_payload(await read_json(response))
+                        quest_catalog.put(quest_type, quest_info)
                         logger.info(f"{Fore.GREEN}[+] Successfully fetched {len(quest_info)} {quest_type} quests{Style.RESET_ALL}")
                         return quest_info
                     raise APIEndpointError(f"Failed to get quests: {response.status}")
         except APIEndpointError as e:
             logger.error(f"{Fore.RED}[!] Quest endpoint error: {str(e)}{Style.RESET_ALL}")
-            return []
+            return None
 
-    async def complete_all_quests(self, quest_type: str = "daily"):
+    async def complete_all_quests(self, quest_type: str = "daily") -> bool:
         try:
             quests = await self.get_quests(quest_type)
+            if quests is None:
+                logger.error(f"{Fore.RED}[!] Could not fetch {quest_type} quests, retrying later{Style.RESET_ALL}")
+                return False
             if not quests:
                 logger.info(f"{Fore.YELLOW}[*] No {quest_type} quests found to complete{Style.RESET_ALL}")
-                return
+                return True
 
-            available_types = {quest["type"] for quest in quests}
-            filtered_quests = quests
+            state = get_state_store()
+            done_ids = state.completed_quests(self.account_key, quest_type)
+            filtered_quests = [quest for quest in quests if str(quest.id) not in done_ids]
+            if len(filtered_quests) < len(quests):
+                logger.info(f"{Fore.BLUE}[*] Skipping {len(quests) - len(filtered_quests)} {quest_type} quests already completed{Style.RESET_ALL}")
 
             completed = 0
             total = len(filtered_quests)
 
             if total == 0:
-                logger.info(f"{Fore.YELLOW}[*] No quests found{Style.RESET_ALL}")
-                return
+                logger.info(f"{Fore.YELLOW}[*] No pending {quest_type} quests{Style.RESET_ALL}")
+                return True
+
+            semaphore = asyncio.Semaphore(QUEST_CONCURRENCY)
+
+            def mark_done(quest: QuestInfo):
+                nonlocal completed
+                completed += 1
+                state.mark_quest_done(self.account_key, quest_type, quest.id)
+
+            async def advance(quest: QuestInfo) -> Optional[str]:
+                async with semaphore:
+                    try:
+                        return await self.quest_progress(quest.id, quest_type)
+                    except APIEndpointError as e:
+                        logger.error(f"{Fore.RED}[!] Quest endpoint error: {str(e)}{Style.RESET_ALL}")
+                    except (KeyError, TypeError, ValueError, aiohttp.ClientError) as e:
+                        logger.error(f"{Fore.RED}[!] Error parsing quest response: {e}{Style.RESET_ALL}")
+                    return None
+
+            async def claim(quest: QuestInfo):
+                async with semaphore:
+                    try:
+                        if await self.claim_quest(quest.id, quest_type):
+                            mark_done(quest)
+                    except (aiohttp.ClientError, EndpointUnavailableError) as e:
+                        logger.error(f"{Fore.RED}[!] Error claiming quest {quest.id}: {e}{Style.RESET_ALL}")
 
             for quest in filtered_quests:
-                quest_id = quest["id"]
-                logger.info(f"\n{Fore.CYAN}[*] Processing {quest_type} quest: {quest['title']} (Type: {quest['type']}) (ID: {quest_id}){Style.RESET_ALL}")
-                
-                result = await self.complete_quest(quest_id, quest_type)
-                if result:
-                    completed += 1
-                
-                if completed < total:
-                    await asyncio.sleep(2)
+                logger.info(f"{Fore.CYAN}[*] Processing {quest_type} quest: {quest.title} (Type: {quest.type}) (ID: {quest.id}){Style.RESET_ALL}")
+
+            # Progress every quest at once, claim the ready ones straight away and
+            # re-poll everything stuck in VERIFY together after a single wait
+            batch = filtered_quests
+            claims = []
+            polls = 0
+            try:
+                while batch:
+                    statuses = await asyncio.gather(*(advance(quest) for quest in batch))
+                    verifying = []
+                    for quest, status in zip(batch, statuses):
+                        if status == "DONE":
+                            mark_done(quest)
+                        elif status == "CLAIM":
+                            claims.append(asyncio.create_task(claim(quest)))
+                        elif status == "VERIFY":
+                            verifying.append(quest)
+                        elif status is not None:
+                            logger.info(f"{Fore.YELLOW}[!] Quest {quest.id} not completed. Final status: {status}{Style.RESET_ALL}")
+
+                    if not verifying:
+                        break
+                    if polls >= QUEST_VERIFY_POLLS:
+                        for quest in verifying:
+                            logger.info(f"{Fore.YELLOW}[!] Quest {quest.id} not completed. Final status: VERIFY{Style.RESET_ALL}")
+                        break
+                    logger.info(f"{Fore.YELLOW}[*] {len(verifying)} quests require verification. Waiting {QUEST_VERIFY_DELAY} seconds...{Style.RESET_ALL}")
+                    await pause(QUEST_VERIFY_DELAY, "quest_verify")
+                    batch = verifying
+                    polls += 1
+
+                if claims:
+                    await asyncio.gather(*claims)
+            finally:
+                # Claims must not outlive this call when it is cancelled (step timeout) or fails
+                for task in claims:
+                    task.cancel()
+                if claims:
+                    await asyncio.gather(*claims, return_exceptions=True)
+                # One transaction for every quest this call finished
+                state.flush()
 
             logger.info(f"\n{Fore.GREEN}[+] {quest_type.capitalize()} quest completion summary: {completed}/{total} processed successfully{Style.RESET_ALL}")
+            return completed == total
 
         except Exception as e:
             logger.error(f"{Fore.RED}[!] Error in complete_all_quests: {str(e)}{Style.RESET_ALL}")
+            return False
 
-    async def complete_quest(self, quest_id: int, quest_type: str = "daily") -> bool:
+    async def quest_progress(self, quest_id: int, quest_type: str = "daily") -> Optional[str]:
         endpoint_base = "daily" if quest_type == "daily" else "single"
-        try:
-            progress_endpoint_key = f"{endpoint_base}_progress"
-            if progress_endpoint_key not in self.endpoint_map:
-                raise APIEndpointError(f"Unknown endpoint key: {progress_endpoint_key}")
-                
-            progress_endpoint = self.endpoint_map[progress_endpoint_key].format(quest_id=quest_id)
-            claim_endpoint = self.endpoint_map[f"{endpoint_base}_claim"].format(quest_id=quest_id)
-            
-            async with aiohttp.ClientSession(headers=self.headers, cookies=self.cookies) as session:
-                async with session.post(f"{self.base_url}{progress_endpoint}") as progress_response:
-                    if progress_response.status == 409:
-                        logger.info(f"{Fore.BLUE}[*] Quest {quest_id} already completed{Style.RESET_ALL}")
-                        return True
-                    if progress_response.status != 200:
-                        raise APIEndpointError(f"Quest progress failed: {progress_response.status}")
-                        return False
-                    
-                    try:
-                        progress_data = await progress_response.json()
-                        status = progress_data.get("data", {}).get("status")
-                        reward_amount = progress_data.get("data", {}).get("reward", {}).get("rewardAmount", "")
-                        logger.info(f"{Fore.CYAN}[*] Initial status: {status}{Style.RESET_ALL}")
-                        
-                        if status == "DONE":
-                            logger.info(f"{Fore.GREEN}[+] Quest {quest_id} completed! Reward: {reward_amount} WARBOND{Style.RESET_ALL}")
-                            return True
-                        
-                        if status == "VERIFY":
-                            logger.info(f"{Fore.YELLOW}[*] Quest {quest_id} requires verification. Waiting 3 seconds...{Style.RESET_ALL}")
-                            await asyncio.sleep(3)
-                            
-                            async with session.post(f"{self.base_url}{progress_endpoint}") as verify_response:
-                                if verify_response.status == 409:
-                                    logger.info(f"{Fore.BLUE}[*] Quest {quest_id} already claimed{Style.RESET_ALL}")
-                                    return True
-                                
-                                verify_data = await verify_response.json()
-                                status = verify_data.get("data", {}).get("status")
-                                logger.info(f"{Fore.CYAN}[*] Status after verify: {status}{Style.RESET_ALL}")
-                        
-                        if status == "CLAIM":
-                            async with session.post(f"{self.base_url}{claim_endpoint}") as claim_response:
-                                if claim_response.status == 200:
-                                    logger.info(f"{Fore.GREEN}[+] Successfully claimed quest {quest_id}{Style.RESET_ALL}")
-                                    return True
-                                elif claim_response.status == 409:
-                                    logger.info(f"{Fore.BLUE}[*] Quest {quest_id} already claimed{Style.RESET_ALL}")
-                                    return True
-                        
-                        logger.info(f"{Fore.YELLOW}[!] Quest {quest_id} not completed. Final status: {status}{Style.RESET_ALL}")
-                        return False
-                        
-                    except (KeyError, TypeError) as e:
-                        logger.error(f"{Fore.RED}[!] Error parsing quest response: {e}{Style.RESET_ALL}")
-                        return False
-                    
-        except APIEndpointError as e:
-            logger.error(f"{Fore.RED}[!] Quest endpoint error: {str(e)}{Style.RESET_ALL}")
+        progress_endpoint_key = f"{endpoint_base}_progress"
+        if progress_endpoint_key not in self.endpoint_map:
+            raise APIEndpointError(f"Unknown endpoint key: {progress_endpoint_key}")
+
+        progress_endpoint = self.endpoint_map[progress_endpoint_key].format(quest_id=quest_id)
+        async with self.request("POST", progress_endpoint_key, progress_endpoint) as progress_response:
+            if progress_response.status == 409:
+                logger.info(f"{Fore.BLUE}[*] Quest {quest_id} already completed{Style.RESET_ALL}")
+                return "DONE"
+            if progress_response.status != 200:
+                raise APIEndpointError(f"Quest progress failed: {progress_response.status}")
+
+            progress = QuestProgress.from_payload(await read_json(progress_response))
+            status, reward_amount = progress.status, progress.reward_amount
+            logger.info(f"{Fore.CYAN}[*] Quest {quest_id} status: {status}{Style.RESET_ALL}")
+            if status == "DONE":
+                logger.info(f"{Fore.GREEN}[+] Quest {quest_id} completed! Reward: {reward_amount} WARBOND{Style.RESET_ALL}")
+                self.ledger.credit(reward_amount)
+            elif reward_amount != "":
+                self._quest_rewards[(quest_type, quest_id)] = reward_amount
+            return status
+
+    async def claim_quest(self, quest_id: int, quest_type: str = "daily") -> bool:
+        endpoint_base = "daily" if quest_type == "daily" else "single"
+        claim_endpoint_key = f"{endpoint_base}_claim"
+        claim_endpoint = self.endpoint_map[claim_endpoint_key].format(quest_id=quest_id)
+        async with self.request("POST", claim_endpoint_key, claim_endpoint) as claim_response:
+            if claim_response.status == 200:
+                logger.info(f"{Fore.GREEN}[+] Successfully claimed quest {quest_id}{Style.RESET_ALL}")
+                self.ledger.credit(self._quest_rewards.pop((quest_type, quest_id), None))
+                return True
+            elif claim_response.status == 409:
+                logger.info(f"{Fore.BLUE}[*] Quest {quest_id} already claimed{Style.RESET_ALL}")
+                return True
+            logger.info(f"{Fore.YELLOW}[!] Quest {quest_id} claim failed. Status: {claim_response.status}{Style.RESET_ALL}")
             return False
 
     async def use_referral_code(self, code: str) -> bool:
@@ -221,22 +598,39 @@ class MemesWarAPI:
             endpoint = self.endpoint_map["referral"].format(code=code)
             await self.validate_endpoint("referral", "PUT")
             
-            async with aiohttp.ClientSession(headers=self.headers, cookies=self.cookies) as session:
-                async with session.put(f"{self.base_url}{endpoint}") as response:
-                    if response.status == 200:
-                        logger.info(f"{Fore.GREEN}[+] Successfully used referral code: {code}{Style.RESET_ALL}")
-                        return True
-                    elif response.status == 409:
-                        logger.info(f"{Fore.BLUE}[*] Referral code {code} already used{Style.RESET_ALL}")
-                        return True
-                    else:
-                        logger.error(f"{Fore.RED}[!] Failed to use referral code. Status: {response.status}{Style.RESET_ALL}")
-                        return False
+            async with self.request("PUT", "referral", endpoint) as response:
+                self.check_endpoint_status("referral", response.status)
+                if response.status == 200:
+                    logger.info(f"{Fore.GREEN}[+] Successfully used referral code: {code}{Style.RESET_ALL}")
+                    self.ledger.mark_stale()
+                    return True
+                elif response.status == 409:
+                    logger.info(f"{Fore.BLUE}[*] Referral code {code} already used{Style.RESET_ALL}")
+                    return True
+                else:
+                    logger.error(f"{Fore.RED}[!] Failed to use referral code. Status: {response.status}{Style.RESET_ALL}")
+                    return False
         except Exception as e:
             logger.error(f"{Fore.RED}[!] Error using referral code: {str(e)}{Style.RESET_ALL}")
             return False
 
+    def check_endpoint_status(self, endpoint_key: str, status: int):
+        # A real request failing like this means the cached validation is stale
+        if status in (401, 404):
+            endpoint_health.invalidate(endpoint_key)
+
     async def validate_endpoint(self, endpoint_key: str, method: str = "GET", data: dict = None) -> bool:
+        if endpoint_health.is_healthy(endpoint_key, method):
+            return True
+
+        async with endpoint_health.lock(endpoint_key, method):
+            if endpoint_health.is_healthy(endpoint_key, method):
+                return True
+            await self.probe_endpoint(endpoint_key, method, data)
+            endpoint_health.mark_healthy(endpoint_key, method)
+            return True
+
+    async def probe_endpoint(self, endpoint_key: str, method: str = "GET", data: dict = None) -> bool:
         endpoint = self.endpoint_map.get(endpoint_key)
         if not endpoint:
             raise APIEndpointError(f"Unknown endpoint key: {endpoint_key}")
@@ -250,72 +644,79 @@ class MemesWarAPI:
                 "warbondCount": 1  # Gunakan nilai minimal untuk test
             }
 
-        retries = 0
-        while retries < self.max_retries:
-            try:
-                async with aiohttp.ClientSession(headers=self.headers, cookies=self.cookies) as session:
-                    request_method = getattr(session, method.lower())
-                    async with request_method(f"{self.base_url}{endpoint}", json=data, timeout=10) as response:
-                        if endpoint_key == "guild_warbond" and response.status == 400:
-                            return True
-
-                        if response.status == 404:
-                            logger.error(f"{Fore.RED}[!] Endpoint {endpoint} not found. API might have changed.{Style.RESET_ALL}")
-                            raise APIEndpointError(f"Endpoint {endpoint} not found")
-                        elif response.status == 401:
-                            logger.error(f"{Fore.RED}[!] Authentication failed for {endpoint}{Style.RESET_ALL}")
-                            raise APIEndpointError("Authentication failed")
-                        elif response.status not in [200, 409]:
-                            if retries < self.max_retries - 1:
-                                retries += 1
-                                await asyncio.sleep(2 ** retries)
-                                continue
-                            raise APIEndpointError(f"Unexpected response: {response.status}")
-                        return True
-            except Exception as e:
-                if retries < self.max_retries - 1:
-                    retries += 1
-                    await asyncio.sleep(2 ** retries)
-                    continue
-                raise APIEndpointError(f"Error accessing {endpoint}: {str(e)}")
+        try:
+            async with self.request(method, endpoint_key, endpoint, json=data, timeout=10) as response:
+                if endpoint_key == "guild_warbond" and response.status == 400:
+                    return True
 
-    async def get_user_info(self, print_info=True) -> Dict:
-        async with aiohttp.ClientSession(headers=self.headers, cookies=self.cookies) as session:
-            async with session.get(f"{self.base_url}/user") as response:
-                if response.status == 200:
-                    data = await response.json()
-                    user = data["data"]["user"]
-                    if print_info:
-                        self.print_user_info(user)
-                    return user
-                return {}
-
-    def print_user_info(self, user):
+                if response.status == 404:
+                    logger.error(f"{Fore.RED}[!] Endpoint {endpoint} not found. API might have changed.{Style.RESET_ALL}")
+                    raise APIEndpointError(f"Endpoint {endpoint} not found")
+                elif response.status == 401:
+                    logger.error(f"{Fore.RED}[!] Authentication failed for {endpoint}{Style.RESET_ALL}")
+                    raise AuthenticationError()
+                elif response.status not in [200, 409]:
+                    raise EndpointUnavailableError(f"Unexpected response: {response.status}")
+                return True
+        except APIEndpointError:
+            raise
+        except Exception as e:
+            raise EndpointUnavailableError(f"Error accessing {endpoint}: {str(e)}")
+
+    async def get_user_info(self, print_info=True) -> Optional[UserInfo]:
+        async with self.request("GET", "user", self.endpoint_map["user"]) as response:
+            self.check_endpoint_status("user", response.status)
+            if response.status == 200:
+                user = UserInfo.from_payload(await read_json(response))
+                if print_info:
+                    self.print_user_info(user)
+                return user
+            return None
+
+    def print_user_info(self, user: UserInfo, honor_label: str = ""):
         now = datetime.now().strftime("%H:%M:%S")
-        print(f"\n{Fore.CYAN}╭── User Info [{now}] ───")
-        print(f"│ {Fore.WHITE}Nick: {user['nickname']}")
-        print(f"│ {Fore.WHITE}Honor: {user['honorPoints']} │ Rank: {user['honorPointRank']}")
-        print(f"│ {Fore.WHITE}Warbonds: {user['warbondTokens']}")
-        print(f"{Fore.CYAN}╰{'─' * 30}{Style.RESET_ALL}")
+        logger.info(
+            f"\n{Fore.CYAN}╭── User Info [{now}] ───\n"
+            f"│ {Fore.WHITE}Nick: {user.nickname}\n"
+            f"│ {Fore.WHITE}Honor: {user.honor_points} │ Rank: {user.honor_point_rank}{honor_label}\n"
+            f"│ {Fore.WHITE}Warbonds: {user.warbond_tokens}\n"
+            f"{Fore.CYAN}╰{'─' * 30}{Style.RESET_ALL}"
+        )
 
     async def daily_checkin(self) -> bool:
-        async with aiohttp.ClientSession(headers=self.headers, cookies=self.cookies) as session:
-            async with session.post(f"{self.base_url}/quest/check-in") as response:
-                success = response.status == 200
-                if success:
-                    logger.info(f"{Fore.GREEN}[+] Daily check-in done{Style.RESET_ALL}")
-                return success
-
-    async def claim_treasury(self) -> Dict:
-        async with aiohttp.ClientSession(headers=self.headers, cookies=self.cookies) as session:
-            async with session.post(f"{self.base_url}/quest/treasury") as response:
-                if response.status == 200:
-                    data = await response.json()
-                    rewards = data["data"]
-                    reward_amount = rewards['rewards'][0]['rewardAmount']
-                    logger.info(f"{Fore.GREEN}[+] Treasury claimed: {reward_amount} WARBOND{Style.RESET_ALL}")
-                    return rewards
-                return {}
+        async with self.request("POST", "daily_checkin", self.endpoint_map["daily_checkin"]) as response:
+            self.check_endpoint_status("daily_checkin", response.status)
+            if response.status == 409:
+                logger.info(f"{Fore.BLUE}[*] Daily check-in already done{Style.RESET_ALL}")
+                return True
+            success = response.status == 200
+            if success:
+                logger.info(f"{Fore.GREEN}[+] Daily check-in done{Style.RESET_ALL}")
+                # The check-in response does not reliably carry the reward, re-read later
+                self.ledger.mark_stale()
+            return success
+
+    async def claim_treasury(self) -> Optional[TreasuryReward]:
+        async with self.request("POST", "treasury", self.endpoint_map["treasury"]) as response:
+            self.check_endpoint_status("treasury", response.status)
+            if response.status == 200:
+                rewards = TreasuryReward.from_payload(await read_json(response))
+                logger.info(f"{Fore.GREEN}[+] Treasury claimed: {rewards.reward_amount} WARBOND{Style.RESET_ALL}")
+                self.ledger.credit(rewards.reward_amount)
+                return rewards
+            if response.status == 400:
+                # Cooldown: the treasury is simply not claimable yet
+                try:
+                    payload = await read_json(response)
+                except ValueError:
+                    payload = None
+                cooldown = TreasuryReward.cooldown(payload)
+                if cooldown.left_seconds is not None:
+                    logger.info(f"{Fore.BLUE}[*] Treasury on cooldown for another {int(cooldown.left_seconds)}s{Style.RESET_ALL}")
+                else:
+                    logger.info(f"{Fore.BLUE}[*] Treasury on cooldown{Style.RESET_ALL}")
+                return cooldown
+            return None
 
     async def send_warbonds(self, guild_id: str, warbond_count: int) -> bool:
         payload = {
@@ -324,37 +725,81 @@ class MemesWarAPI:
         }
         
         try:
-            async with aiohttp.ClientSession(headers=self.headers, cookies=self.cookies) as session:
-                async with session.post(
-                    f"{self.base_url}/guild/warbond",
-                    json=payload
-                ) as response:
-                    if response.status == 200:
-                        logger.info(f"{Fore.GREEN}[+] Successfully sent {warbond_count} warbonds to guild{Style.RESET_ALL}")
-                        return True
-                    else:
-                        response_text = await response.text()
-                        logger.error(f"{Fore.RED}[!] Failed to send warbonds. Status: {response.status}")
-                        logger.error(f"[!] Response: {response_text}{Style.RESET_ALL}")
-                        return False
+            async with self.request(
+                "POST", "guild_warbond",
+                self.endpoint_map["guild_warbond"],
+                json=payload
+            ) as response:
+                self.check_endpoint_status("guild_warbond", response.status)
+                if response.status == 200:
+                    logger.info(f"{Fore.GREEN}[+] Successfully sent {warbond_count} warbonds to guild{Style.RESET_ALL}")
+                    self.ledger.debit(warbond_count)
+                    return True
+                else:
+                    response_text = await response.text()
+                    logger.error(f"{Fore.RED}[!] Failed to send warbonds. Status: {response.status}")
+                    logger.error(f"[!] Response: {response_text}{Style.RESET_ALL}")
+                    self.ledger.mark_stale()
+                    return False
         except Exception as e:
             logger.error(f"{Fore.RED}[!] Error sending warbonds: {str(e)}{Style.RESET_ALL}")
             return False
     
     async def claim_single_treasury(self):
         try:
-            await self.claim_treasury()
+            rewards = await self.claim_treasury()
+            if rewards is None:
+                get_state_store().record_step(self.account_key, "treasury", "failed")
+            else:
+                # Next claim time as reported by the API, if it sent one
+                due_at = time.time() + rewards.left_seconds if rewards.left_seconds is not None else None
+                get_state_store().record_step(self.account_key, "treasury", "done" if rewards.claimed else "cooldown", due_at)
+            return rewards
         except Exception as e:
             logger.error(f"{Fore.RED}[!] Treasury error: {e}{Style.RESET_ALL}")
-        return await self.get_user_info(print_info=True)
+            return None
 
-    async def process_account(self, init_data: str, account_number: int, total_accounts: int):
-        logger.info(f"\n{Fore.YELLOW}[*] Processing Account {account_number}/{total_accounts}{Style.RESET_ALL}")
+    async def settle_warbonds(self) -> bool:
+        # One send per account run; /user is only read when the ledger cannot be trusted
+        if self.ledger.needs_reconcile:
+            user_info = await self.get_user_info(print_info=False)
+            if not user_info:
+                logger.error(f"{Fore.RED}[!] Could not get user info to settle warbonds{Style.RESET_ALL}")
+                return False
+            self.ledger.reconcile(user_info.warbond_tokens)
 
-        try:
+        warbond_count = self.ledger.balance
+        logger.info(f"{Fore.CYAN}[*] Warbonds to send: {warbond_count}{Style.RESET_ALL}")
+        if warbond_count <= 0:
+            return True
+
+        sent = await self.send_warbonds(GUILD_ID, warbond_count)
+        if not sent:
+            # The ledger may have over-counted, so re-read the real balance once and try again
+            # instead of leaving everything unsent until the next scheduled run
+            logger.info(f"{Fore.YELLOW}[*] Send failed, re-reading warbond balance and retrying once{Style.RESET_ALL}")
+            user_info = await self.get_user_info(print_info=False)
+            if user_info:
+                warbond_count = self.ledger.reconcile(user_info.warbond_tokens)
+                logger.info(f"{Fore.CYAN}[*] Warbonds to send: {warbond_count}{Style.RESET_ALL}")
+                if warbond_count <= 0:
+                    return True
+                sent = await self.send_warbonds(GUILD_ID, warbond_count)
+        if not sent:
+            logger.error(f"{Fore.RED}[!] Failed to send warbonds{Style.RESET_ALL}")
+        return sent
+
+    def build_account_graph(self, account_number: int, tasks: Set[str], resumed_steps: Set[str]) -> TaskGraph:
+        # Everything that earns warbonds waits for the initial /user read so the ledger
+        # starts from a known balance, then runs side by side; sending waits for all of it
+        state = get_state_store()
+        checkpoint = get_checkpoint()
+        graph = TaskGraph(span=tracer.span if tracer is not None else None, fatal=is_api_change)
+
+        async def validate() -> bool:
             endpoints_to_check = {
                 "user": "GET",
-                "daily_quests": "GET", 
+                "daily_quests": "GET",
                 "single_quests": "GET",
                 "daily_checkin": "POST",
                 "treasury": "POST",
@@ -365,55 +810,113 @@ class MemesWarAPI:
             for endpoint, method in endpoints_to_check.items():
                 try:
                     await self.validate_endpoint(endpoint, method)
+                except (AuthenticationError, EndpointUnavailableError) as e:
+                    logger.error(f"{Fore.RED}[!] Skipping account {account_number}, {endpoint} failed: {str(e)}{Style.RESET_ALL}")
+                    return False
                 except APIEndpointError as e:
                     logger.error(f"{Fore.RED}[!] Critical error validating {endpoint}: {str(e)}{Style.RESET_ALL}")
-                    raise SystemExit(f"Script stopped due to {endpoint} API change")
+                    raise
+            return True
 
+        async def user_info():
             initial_info = await self.get_user_info(print_info=True)
             if not initial_info:
                 logger.error(f"{Fore.RED}[!] Failed to get initial user info{Style.RESET_ALL}")
-                return
+                return False
+            self.ledger.reconcile(initial_info.warbond_tokens)
+            return initial_info
 
-            async def check_and_send_warbonds(stage: str):
-                try:
-                    user_info = await self.get_user_info(print_info=False)
-                    if not user_info:
-                        logger.error(f"{Fore.RED}[!] Could not get user info after {stage}{Style.RESET_ALL}")
-                        return
-                        
-                    warbond_count = int(user_info.get('warbondTokens', '0'))
-                    logger.info(f"{Fore.CYAN}[*] Current warbonds after {stage}: {warbond_count}{Style.RESET_ALL}")
-                    
-                    if warbond_count > 0:
-                        await self.validate_endpoint("guild_warbond", "POST")
-                        sent = await self.send_warbonds(GUILD_ID, warbond_count)
-                        if not sent:
-                            logger.error(f"{Fore.RED}[!] Failed to send warbonds after {stage}{Style.RESET_ALL}")
-                except Exception as e:
-                    logger.error(f"{Fore.RED}[!] Error checking/sending warbonds after {stage}: {str(e)}{Style.RESET_ALL}")
-
-            logger.info(f"\n{Fore.CYAN}[*] Performing daily check-in...{Style.RESET_ALL}")
-            await self.daily_checkin()
-
-            logger.info(f"\n{Fore.CYAN}[*] Applying referral code...{Style.RESET_ALL}")
-            await self.validate_endpoint("referral", "PUT")
-            await self.use_referral_code(REFERRAL_CODE)
+        async def checkin():
+            if state.step_done(self.account_key, "checkin", daily=True):
+                logger.info(f"\n{Fore.BLUE}[*] Daily check-in already done today, skipping{Style.RESET_ALL}")
+            else:
+                logger.info(f"\n{Fore.CYAN}[*] Performing daily check-in...{Style.RESET_ALL}")
+                checked_in = await self.daily_checkin()
+                state.record_step(self.account_key, "checkin", "done" if checked_in else "failed")
+            checkpoint.complete_step(self.account_key, "checkin")
 
-            await check_and_send_warbonds("daily check-in")
+        async def referral():
+            if state.step_done(self.account_key, "referral"):
+                logger.info(f"\n{Fore.BLUE}[*] Referral code already applied, skipping{Style.RESET_ALL}")
+            else:
+                logger.info(f"\n{Fore.CYAN}[*] Applying referral code...{Style.RESET_ALL}")
+                referred = await self.use_referral_code(REFERRAL_CODE)
+                state.record_step(self.account_key, "referral", "done" if referred else "failed")
+            checkpoint.complete_step(self.account_key, "referral")
 
-            logger.info(f"\n{Fore.CYAN}[*] Processing daily quests...{Style.RESET_ALL}")
-            await self.complete_all_quests(quest_type="daily")
+        def quests(quest_type: str):
+            async def run() -> bool:
+                logger.info(f"\n{Fore.CYAN}[*] Processing {quest_type} quests...{Style.RESET_ALL}")
+                return await self.complete_all_quests(quest_type=quest_type)
+            return run
 
-            logger.info(f"\n{Fore.CYAN}[*] Processing single quests...{Style.RESET_ALL}")
-            await self.complete_all_quests(quest_type="single")
-            await check_and_send_warbonds("single quests")
+        async def record_quests():
+            quests_done = graph.outcomes["daily_quests"] == "done" and graph.outcomes["single_quests"] == "done"
+            state.record_step(self.account_key, "quests", "done" if quests_done else "failed")
+            checkpoint.complete_step(self.account_key, "quests")
 
+        async def treasury():
             logger.info(f"\n{Fore.CYAN}[*] Claiming treasury...{Style.RESET_ALL}")
             await self.claim_single_treasury()
-            await check_and_send_warbonds("treasury claim")
+            checkpoint.complete_step(self.account_key, "treasury")
 
-            logger.info(f"\n{Fore.CYAN}[*] Getting final user status...{Style.RESET_ALL}")
-            await self.get_user_info(print_info=True)
+        async def warbonds():
+            logger.info(f"\n{Fore.CYAN}[*] Sending warbonds to guild...{Style.RESET_ALL}")
+            try:
+                await self.settle_warbonds()
+            except Exception as e:
+                logger.error(f"{Fore.RED}[!] Error checking/sending warbonds: {str(e)}{Style.RESET_ALL}")
+            checkpoint.complete_step(self.account_key, "warbonds")
+
+        async def final():
+            logger.info(f"\n{Fore.CYAN}[*] Final user status...{Style.RESET_ALL}")
+            if self.ledger.needs_reconcile:
+                await self.get_user_info(print_info=True)
+            else:
+                # Only warbonds are tracked locally, honor and rank are still the values read at the start
+                self.print_user_info(graph.results["user_info"].with_warbonds(self.ledger.balance),
+                                     honor_label=" (at start of run)")
+
+        earning = ("checkin", "referral", "daily_quests", "single_quests", "treasury")
+        graph.add("validate", validate, timeout=STEP_TIMEOUTS.get("validate"))
+        graph.add("user_info", user_info, requires=("validate",), timeout=STEP_TIMEOUTS.get("user_info"))
+        graph.add("checkin", checkin, requires=("user_info",), timeout=STEP_TIMEOUTS.get("checkin"),
+                  skip=lambda: "checkin" not in tasks)
+        graph.add("referral", referral, requires=("user_info",), timeout=STEP_TIMEOUTS.get("referral"),
+                  skip=lambda: "referral" not in tasks)
+        graph.add("daily_quests", quests("daily"), requires=("user_info",), timeout=STEP_TIMEOUTS.get("quests"),
+                  skip=lambda: "quests" not in tasks)
+        graph.add("single_quests", quests("single"), requires=("user_info",), timeout=STEP_TIMEOUTS.get("quests"),
+                  skip=lambda: "quests" not in tasks)
+        graph.add("quests", record_quests, requires=("user_info",), after=("daily_quests", "single_quests"),
+                  skip=lambda: "quests" not in tasks)
+        graph.add("treasury", treasury, requires=("user_info",), timeout=STEP_TIMEOUTS.get("treasury"),
+                  skip=lambda: "treasury" not in tasks)
+        graph.add("warbonds", warbonds, requires=("user_info",), after=earning, timeout=STEP_TIMEOUTS.get("warbonds"),
+                  skip=lambda: "warbonds" in resumed_steps)
+        graph.add("final", final, requires=("user_info",), after=("warbonds",), timeout=STEP_TIMEOUTS.get("final"))
+        return graph
+
+    async def process_account(self, init_data: str, account_number: int, total_accounts: int,
+                              tasks: Optional[Set[str]] = None) -> bool:
+        tasks = set(ACCOUNT_TASKS) if tasks is None else tasks
+        account_context.set(self.account_key)
+        # Steps this account already finished before a restart in the middle of the cycle
+        checkpoint = get_checkpoint()
+        resumed_steps = checkpoint.completed_steps(self.account_key)
+        if resumed_steps:
+            tasks = tasks - resumed_steps
+            logger.info(f"{Fore.BLUE}[*] Resuming account, already finished: {', '.join(sorted(resumed_steps))}{Style.RESET_ALL}")
+        logger.info(f"\n{Fore.YELLOW}[*] Processing Account {account_number}/{total_accounts}{Style.RESET_ALL}")
+
+        try:
+            graph = self.build_account_graph(account_number, tasks, resumed_steps)
+            outcomes = await graph.run()
+            return outcomes["validate"] == "done" and outcomes["user_info"] == "done" and not graph.errors
+
+        except (AuthenticationError, EndpointUnavailableError) as e:
+            logger.error(f"{Fore.RED}[!] Account {account_number} failed: {str(e)}{Style.RESET_ALL}")
+            return False
 
         except APIEndpointError as e:
             logger.error(f"{Fore.RED}[!] Critical API endpoint error: {str(e)}")
@@ -425,54 +928,225 @@ class MemesWarAPI:
             import traceback
             logger.error(f"{Fore.RED}[!] Full error traceback:{Style.RESET_ALL}")
             logger.error(traceback.format_exc())
+            return False
 
         finally:
+            # Persist the rest of this run's steps before the checkpoint marks the account done
+            get_state_store().flush()
             logger.info(f"{Fore.GREEN}[+] Finished processing account {account_number}/{total_accounts}{Style.RESET_ALL}")
 
+def is_safe_to_resend(method: str, error: BaseException) -> bool:
+    return method.upper() in IDEMPOTENT_METHODS or isinstance(error, aiohttp.ClientConnectorError)
+
+def is_api_change(error: BaseException) -> bool:
+    # Auth and availability errors only affect one account or one run, anything else
+    # from the endpoint layer means the API itself changed
+    return isinstance(error, APIEndpointError) and not isinstance(error, (AuthenticationError, EndpointUnavailableError))
+
+def next_deadline(state: StateStore, account_key: str, task: str, now: Optional[float] = None) -> Optional[float]:
+    # When a task can next change anything, derived from what we observed last time
+    now = time.time() if now is None else now
+    row = state.get_step(account_key, task)
+    if row is None:
+        return now
+    outcome, updated_at, due_at = row
+    if due_at is not None:
+        # The API told us when the task is available again
+        return max(now, due_at)
+    if outcome != "done":
+        return max(now, updated_at + TASK_RETRY_DELAY)
+    if task == "referral":
+        return None
+    if task == "checkin":
+        return state.next_reset(updated_at)
+    if task == "quests":
+        return min(state.next_reset(updated_at), updated_at + QUEST_REFRESH_INTERVAL)
+    return updated_at + TREASURY_INTERVAL
+
+def schedule_account(scheduler: DeadlineScheduler, state: StateStore, account_key: str,
+                     tasks=ACCOUNT_TASKS, after_run: bool = False):
+    now = time.time()
+    for task in tasks:
+        due_at = next_deadline(state, account_key, task, now)
+        if due_at is None:
+            continue
+        if after_run and due_at <= now:
+            # Task never got to record an outcome (account failed early), back off
+            due_at = now + TASK_RETRY_DELAY
+        scheduler.schedule(due_at, account_key, task)
+
+async def run_cycle(accounts: List[str], due: Optional[Dict[int, Set[str]]] = None) -> Dict[str, int]:
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_ACCOUNTS)
+    stop = asyncio.Event()
+    summary = {"succeeded": 0, "failed": 0, "skipped": 0}
+    fatal: List[SystemExit] = []
+    total = len(accounts)
+
+    async def worker(account_number: int, init_data: str, tasks: Optional[Set[str]]):
+        async with semaphore:
+            if stop.is_set():
+                summary["skipped"] += 1
+                return
+            try:
+                async with MemesWarAPI(init_data) as api:
+                    success = await api.process_account(init_data, account_number, total, tasks)
+                get_checkpoint().complete_account(api.account_key)
+                summary["succeeded" if success else "failed"] += 1
+            except SystemExit as e:
+                # Only raised for API-wide changes, so drain the pool
+                summary["failed"] += 1
+                fatal.append(e)
+                stop.set()
+            except Exception as e:
+                logger.error(f"{Fore.RED}[!] Error on account {account_number}: {e}{Style.RESET_ALL}")
+                summary["failed"] += 1
+
+    if due is None:
+        due = {i: None for i in range(1, total + 1)}
+    await asyncio.gather(*(worker(i, accounts[i - 1], tasks) for i, tasks in sorted(due.items())))
+
+    if fatal:
+        raise fatal[0]
+    return summary
+
 async def main():
-    api = MemesWarAPI("")
-    api.print_banner()
+    if SHARD_COUNT == 1:
+        MemesWarAPI.print_banner()
     
-    accounts = read_accounts()
+    # Shards are assigned from the raw line so each shard only encodes its own accounts
+    source = AccountSource('data.txt', encode_init_data, get_account_key,
+                           accept=(lambda raw: in_shard(get_account_key(raw))) if SHARD_COUNT > 1 else None)
+    accounts = read_accounts(source)
+    report_progress("loaded", accounts=len(accounts))
     if not accounts:
         logger.error(f"{Fore.RED}[!] No accounts found{Style.RESET_ALL}")
         return
 
-    cycle = 1
+    state = get_state_store()
+    scheduler = DeadlineScheduler()
+    for account_key in accounts:
+        schedule_account(scheduler, state, account_key)
+
+    def reload_accounts():
+        # Pick up edits to data.txt between cycles without restarting
+        nonlocal accounts
+        if not source.changed():
+            return
+        try:
+            updated = source.load()
+        except (OSError, UnicodeDecodeError) as e:
+            logger.error(f"{Fore.RED}[!] Error reloading data.txt: {e}{Style.RESET_ALL}")
+            return
+        added = [account_key for account_key in updated if account_key not in accounts]
+        removed = [account_key for account_key in accounts if account_key not in updated]
+        accounts = updated
+        for account_key in removed:
+            scheduler.discard(account_key)
+        for account_key in added:
+            schedule_account(scheduler, state, account_key)
+        logger.info(f"{Fore.GREEN}[+] data.txt changed: {len(added)} added, {len(removed)} removed, {len(accounts)} total{Style.RESET_ALL}")
+
+    checkpoint = get_checkpoint()
+    checkpoint.load()
+    cycle = checkpoint.cycle + 1
+    resumed = {account_key: tasks for account_key, tasks in checkpoint.pending().items() if account_key in accounts}
+    if resumed:
+        cycle = checkpoint.cycle
+        for account_key, tasks in resumed.items():
+            scheduler.discard(account_key, tasks)
+        logger.info(f"{Fore.GREEN}[+] Resuming cycle {cycle} from checkpoint: {len(resumed)} accounts left{Style.RESET_ALL}")
+
     while True:
-        print(f"\n{Fore.CYAN}╭── Cycle #{cycle} ───")
-        print(f"╰── Started at: {datetime.now().strftime('%H:%M:%S')}{Style.RESET_ALL}")
-        
-        for i, init_data in enumerate(accounts, 1):
-            try:
-                if i > 1:
-                    logger.info(f"\n{Fore.CYAN}[*] Waiting 5 seconds before next account...{Style.RESET_ALL}")
-                    await asyncio.sleep(5)
-                
-                api = MemesWarAPI(init_data)
-                await api.process_account(init_data, i, len(accounts))
-                
-            except SystemExit as e:
-                logger.error(f"{Fore.RED}[!] Critical error - stopping script: {str(e)}{Style.RESET_ALL}")
-                return
-                
-            except Exception as e:
-                logger.error(f"{Fore.RED}[!] Error on account {i}: {e}{Style.RESET_ALL}")
-                continue
+        reload_accounts()
+        if resumed:
+            # Finish the interrupted cycle first, keeping the steps it already completed
+            due, resumed = resumed, None
+        else:
+            if not len(scheduler):
+                # data.txt was emptied or caught half-saved; keep polling it instead of exiting
+                logger.info(f"{Fore.YELLOW}[*] No accounts left in data.txt, waiting for it to change{Style.RESET_ALL}")
+                while not len(scheduler):
+                    await pause(60, "scheduler_idle")
+                    reload_accounts()
+            remaining = scheduler.next_due() - time.time()
+            if remaining > 0:
+                minutes, seconds = divmod(int(remaining), 60)
+                logger.info(f"{Fore.YELLOW}[*] Waiting for next due task, next run in: {minutes:02d}:{seconds:02d}{Style.RESET_ALL}")
+                while remaining > 0:
+                    await pause(min(remaining, 60), "scheduler_idle")
+                    reload_accounts()
+                    if not len(scheduler):
+                        break
+                    remaining = scheduler.next_due() - time.time()
+                if not len(scheduler):
+                    continue
+
+            due = scheduler.pop_due(window=SCHEDULER_BATCH_WINDOW)
+            # Snapshot rewrite and fsync stay off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, checkpoint.begin_cycle, cycle, due)
+        account_list = list(accounts.values())
+        numbers = {account_key: i for i, account_key in enumerate(accounts, 1)}
+        due_by_number = {numbers[account_key]: tasks for account_key, tasks in due.items() if account_key in numbers}
+        logger.info(
+            f"\n{Fore.CYAN}╭── Cycle #{cycle} ───\n"
+            f"╰── Started at: {datetime.now().strftime('%H:%M:%S')} │ {len(due_by_number)} accounts due{Style.RESET_ALL}"
+        )
+
+        try:
+            summary = await run_cycle(account_list, due_by_number)
+        except SystemExit as e:
+            logger.error(f"{Fore.RED}[!] Critical error - stopping script: {str(e)}{Style.RESET_ALL}")
+            report_progress("fatal", message=str(e))
+            return
+
+        await asyncio.get_running_loop().run_in_executor(None, checkpoint.finish_cycle)
+        await write_cycle_trace(cycle)
+        report_progress("summary", cycle=cycle, summary=summary)
+        logger.info(
+            f"\n{Fore.CYAN}[*] Cycle {cycle} summary: "
+            f"{summary['succeeded']} succeeded, {summary['failed']} failed, {summary['skipped']} skipped{Style.RESET_ALL}"
+        )
+        logger.info(f"\n{Fore.GREEN}[+] Cycle {cycle} completed{Style.RESET_ALL}")
+
+        for account_key, tasks in due.items():
+            if account_key in accounts:
+                schedule_account(scheduler, state, account_key, tasks, after_run=True)
 
-        print(f"\n{Fore.GREEN}[+] Cycle {cycle} completed{Style.RESET_ALL}")
-        print(f"{Fore.YELLOW}[*] Waiting 1 hour before next cycle...{Style.RESET_ALL}")
-        
-        for minutes in range(59, -1, -1):
-            print(f"\r{Fore.CYAN}[*] Next cycle in: {minutes:02d}:00{Style.RESET_ALL}", end="")
-            await asyncio.sleep(60)
-        print()
-        
         cycle += 1
 
+async def run():
+    background = []
+    metrics_runner = None
+    if trace_file:
+        enable_tracing(trace_file)
+        logger.info(f"{Fore.GREEN}[+] Tracing enabled, writing one file per cycle next to {trace_file}{Style.RESET_ALL}")
+    if metrics_file:
+        background.append(asyncio.create_task(flush_metrics_periodically()))
+    if metrics_port:
+        metrics_runner = await start_metrics_server(metrics_port)
+    try:
+        await main()
+    finally:
+        for task in background:
+            task.cancel()
+        if metrics_file:
+            metrics.write_json(metrics_file)
+        write_trace()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await close_connector()
+        if _state_store is not None:
+            _state_store.close()
+        if _checkpoint is not None:
+            _checkpoint.close()
+
 if __name__ == "__main__":
+    if SHARDS > 1:
+        from ShardRunner import run_sharded
+        run_sharded(SHARDS, MemesWarAPI.print_banner)
+        raise SystemExit(0)
     try:
-        asyncio.run(main())
+        asyncio.run(run())
     except KeyboardInterrupt:
         print(f"\n{Fore.YELLOW}[!] Script terminated by user{Style.RESET_ALL}")
     except Exception as e:
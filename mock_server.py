@@ -0,0 +1,225 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, Optional
+
+from aiohttp import web
+
+DAILY_QUESTS = [{"id": 100 + i, "type": "DAILY", "title": f"Daily quest {i}"} for i in range(1, 4)]
+SINGLE_QUESTS = [{"id": 200 + i, "type": "SINGLE", "title": f"Single quest {i}"} for i in range(1, 6)]
+
+class MockAccount:
+    def __init__(self):
+        self.nickname = f"mock_{random.randint(1000, 9999)}"
+        self.honor_points = 0
+        self.warbonds = 0
+        self.checked_in_day: Optional[int] = None
+        self.referral: Optional[str] = None
+        self.treasury_at = 0.0
+        # (quest_type, quest_id) -> [status, verify_started_at]
+        self.quests: Dict[tuple, list] = {}
+
+class MockMemesWarServer:
+    # Local stand-in for the Memes War API, for benchmarks and offline testing
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 verify_delay: float = 3.0, treasury_cooldown: float = 3600.0, quest_reward: int = 500,
+                 daily_quests=None, single_quests=None, throttle_rate: float = 0.0, retry_after: float = 1.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.verify_delay = verify_delay
+        self.treasury_cooldown = treasury_cooldown
+        self.quest_reward = quest_reward
+        self.quest_catalog = {
+            "daily": daily_quests if daily_quests is not None else DAILY_QUESTS,
+            "single": single_quests if single_quests is not None else SINGLE_QUESTS,
+        }
+        self.accounts: Dict[str, MockAccount] = {}
+        self.request_count = 0
+        self.status_counts: Dict[int, int] = {}
+        self.app = self.build_app()
+
+    def build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get("/api/user", self.get_user)
+        app.router.add_get("/api/quest/{quest_type}/list", self.get_quests)
+        app.router.add_post("/api/quest/check-in", self.check_in)
+        app.router.add_post("/api/quest/treasury", self.treasury)
+        app.router.add_post("/api/guild/warbond", self.warbond)
+        app.router.add_put("/api/user/referral/{code}", self.referral)
+        app.router.add_post("/api/quest/{quest_type}/{quest_id}/progress", self.progress)
+        app.router.add_post("/api/quest/{quest_type}/{quest_id}/claim", self.claim)
+        return app
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler):
+        self.request_count += 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if self.error_rate and random.random() < self.error_rate:
+            response = web.json_response({"message": "injected error"}, status=500)
+        elif self.throttle_rate and random.random() < self.throttle_rate:
+            response = web.json_response({"message": "too many requests"}, status=429,
+                                         headers={"Retry-After": f"{self.retry_after:g}"})
+        else:
+            try:
+                response = await handler(request)
+            except web.HTTPException as e:
+                # Count it, then let aiohttp render the error as it normally would
+                self.status_counts[e.status] = self.status_counts.get(e.status, 0) + 1
+                raise
+        self.status_counts[response.status] = self.status_counts.get(response.status, 0) + 1
+        return response
+
+    def account(self, request: web.Request) -> MockAccount:
+        init_data = request.cookies.get("telegramInitData")
+        if not init_data:
+            raise web.HTTPUnauthorized()
+        if init_data not in self.accounts:
+            self.accounts[init_data] = MockAccount()
+        return self.accounts[init_data]
+
+    def quest_type(self, request: web.Request) -> str:
+        quest_type = request.match_info["quest_type"]
+        if quest_type not in self.quest_catalog:
+            raise web.HTTPNotFound()
+        return quest_type
+
+    async def get_user(self, request: web.Request) -> web.Response:
+        account = self.account(request)
+        return web.json_response({"data": {"user": {
+            "nickname": account.nickname,
+            "honorPoints": account.honor_points,
+            "honorPointRank": 1,
+            "warbondTokens": str(account.warbonds),
+        }}})
+
+    async def get_quests(self, request: web.Request) -> web.Response:
+        self.account(request)
+        quest_type = self.quest_type(request)
+        quests = [dict(quest, description="", rewards=[{"rewardType": "WARBOND", "rewardAmount": str(self.quest_reward)}])
+                  for quest in self.quest_catalog[quest_type]]
+        return web.json_response({"data": {"quests": quests}})
+
+    async def check_in(self, request: web.Request) -> web.Response:
+        account = self.account(request)
+        today = int(time.time() // 86400)
+        if account.checked_in_day == today:
+            return web.json_response({"message": "already checked in"}, status=409)
+        account.checked_in_day = today
+        account.warbonds += 100
+        return web.json_response({"data": {"rewards": [{"rewardType": "WARBOND", "rewardAmount": "100"}]}})
+
+    async def treasury(self, request: web.Request) -> web.Response:
+        account = self.account(request)
+        now = time.time()
+        if now - account.treasury_at < self.treasury_cooldown:
+            return web.json_response({"message": "treasury on cooldown", "data": {
+                "leftSecondsUntilTreasury": int(account.treasury_at + self.treasury_cooldown - now),
+            }}, status=400)
+        account.treasury_at = now
+        account.warbonds += 1000
+        return web.json_response({"data": {
+            "rewards": [{"rewardType": "WARBOND", "rewardAmount": "1000"}],
+            "leftSecondsUntilTreasury": int(self.treasury_cooldown),
+        }})
+
+    async def warbond(self, request: web.Request) -> web.Response:
+        account = self.account(request)
+        try:
+            payload = await request.json()
+            count = int(payload["warbondCount"])
+            payload["guildId"]
+        except (ValueError, KeyError, TypeError, json.JSONDecodeError):
+            return web.json_response({"message": "invalid payload"}, status=400)
+        if count <= 0 or count > account.warbonds:
+            return web.json_response({"message": "not enough warbonds"}, status=400)
+        account.warbonds -= count
+        return web.json_response({"data": {"warbondCount": str(count)}})
+
+    async def referral(self, request: web.Request) -> web.Response:
+        account = self.account(request)
+        if account.referral is not None:
+            return web.json_response({"message": "referral already used"}, status=409)
+        account.referral = request.match_info["code"]
+        return web.json_response({"data": {}})
+
+    def quest_state(self, request: web.Request, account: MockAccount) -> list:
+        quest_type = self.quest_type(request)
+        try:
+            quest_id = int(request.match_info["quest_id"])
+        except ValueError:
+            raise web.HTTPNotFound()
+        if quest_id not in {quest["id"] for quest in self.quest_catalog[quest_type]}:
+            raise web.HTTPNotFound()
+        return account.quests.setdefault((quest_type, quest_id), ["PENDING", 0.0])
+
+    async def progress(self, request: web.Request) -> web.Response:
+        account = self.account(request)
+        state = self.quest_state(request, account)
+        if state[0] == "DONE":
+            return web.json_response({"message": "quest already done"}, status=409)
+        if state[0] == "PENDING":
+            state[0], state[1] = "VERIFY", time.time()
+        elif state[0] == "VERIFY" and time.time() - state[1] >= self.verify_delay:
+            state[0] = "CLAIM"
+        return web.json_response({"data": {
+            "status": state[0],
+            "reward": {"rewardType": "WARBOND", "rewardAmount": str(self.quest_reward)},
+        }})
+
+    async def claim(self, request: web.Request) -> web.Response:
+        account = self.account(request)
+        state = self.quest_state(request, account)
+        if state[0] == "DONE":
+            return web.json_response({"message": "quest already claimed"}, status=409)
+        if state[0] != "CLAIM":
+            return web.json_response({"message": f"quest is {state[0]}"}, status=400)
+        state[0] = "DONE"
+        account.warbonds += self.quest_reward
+        return web.json_response({"data": {"rewards": [{"rewardType": "WARBOND", "rewardAmount": str(self.quest_reward)}]}})
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}/api"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Local mock Memes War API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="added latency per request (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="uniform +/- latency jitter (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--verify-delay", type=float, default=3.0, help="seconds a quest stays in VERIFY")
+    parser.add_argument("--treasury-cooldown", type=float, default=3600.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with a 429")
+    return parser.parse_args()
+
+async def serve(args):
+    server = MockMemesWarServer(args.latency, args.jitter, args.error_rate, args.verify_delay, args.treasury_cooldown,
+                                throttle_rate=args.throttle_rate, retry_after=args.retry_after)
+    url = await server.start(args.host, args.port)
+    print(f"[+] Mock Memes War API listening on {url}")
+    print(f"[*] Run the bot against it with MEMESWAR_BASE_URL={url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
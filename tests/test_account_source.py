@@ -0,0 +1,55 @@
+import json
+import urllib.parse
+
+import main
+from AccountSource import AccountSource
+
+def raw_line(i: int) -> str:
+    user = json.dumps({"id": 5000000 + i, "first_name": f"u{i}"})
+    return f"query_id=Q{i}&user={urllib.parse.quote(user)}&auth_date=1&hash={i:064x}"
+
+def test_shards_only_encode_their_own_lines(tmp_path, monkeypatch):
+    path = tmp_path / "data.txt"
+    path.write_text("\n".join(raw_line(i) for i in range(40)) + "\n", encoding="utf-8")
+    monkeypatch.setattr(main, "SHARD_COUNT", 2)
+
+    loaded = {}
+    for shard in range(2):
+        monkeypatch.setattr(main, "SHARD_INDEX", shard)
+        encoded = []
+
+        def encode(raw):
+            encoded.append(raw)
+            return main.encode_init_data(raw)
+
+        source = AccountSource(str(path), encode, main.get_account_key,
+                               accept=lambda raw: main.in_shard(main.get_account_key(raw)))
+        accounts = source.load()
+        loaded[shard] = set(accounts)
+        assert len(encoded) == len(loaded[shard])
+        # A second pass over an unchanged file neither encodes nor re-checks anything,
+        # and hands back the same strings instead of keeping a second copy
+        reloaded = source.load()
+        assert len(encoded) == len(loaded[shard])
+        assert all(reloaded[key] is accounts[key] for key in accounts)
+
+    assert loaded[0] and loaded[1]
+    assert not loaded[0] & loaded[1]
+    assert loaded[0] | loaded[1] == {str(5000000 + i) for i in range(40)}
+
+def test_reload_encodes_only_changed_lines(tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_text("\n".join(raw_line(i) for i in range(3)) + "\n", encoding="utf-8")
+    encoded = []
+
+    def encode(raw):
+        encoded.append(raw)
+        return main.encode_init_data(raw)
+
+    source = AccountSource(str(path), encode, main.get_account_key)
+    assert len(source.load()) == 3
+    path.write_text("\n".join(raw_line(i) for i in (1, 2, 3)) + "\n", encoding="utf-8")
+    accounts = source.load()
+    assert encoded[3:] == [raw_line(3)]
+    assert set(accounts) == {str(5000000 + i) for i in (1, 2, 3)}
+    assert len(source._keys) == 3
@@ -0,0 +1,37 @@
+import os
+
+from Checkpoint import CycleCheckpoint
+
+def test_restart_replays_journal_onto_snapshot(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint = CycleCheckpoint(path)
+    checkpoint.begin_cycle(3, {"a": {"checkin", "quests"}, "b": {"quests"}, "c": {"treasury"}})
+    checkpoint.complete_step("a", "checkin")
+    checkpoint.complete_step("b", "quests")
+    checkpoint.complete_account("b")
+    # Process dies here: no compaction, and the last journal line is torn
+    with open(checkpoint.journal_path, "a", encoding="utf-8") as file:
+        file.write('{"cycle":3,"account":"c","st')
+
+    resumed = CycleCheckpoint(path)
+    assert resumed.load()
+    assert resumed.cycle == 3 and resumed.in_progress
+    assert resumed.pending() == {"a": {"checkin", "quests"}, "c": {"treasury"}}
+    assert resumed.completed_steps("a") == {"checkin"}
+    assert resumed.completed_steps("c") == set()
+
+def test_compaction_empties_journal_and_ignores_stale_entries(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint = CycleCheckpoint(path)
+    checkpoint.begin_cycle(1, {"a": {"checkin"}})
+    checkpoint.complete_step("a", "checkin")
+    checkpoint.finish_cycle()
+    assert os.path.getsize(checkpoint.journal_path) == 0
+
+    checkpoint.begin_cycle(2, {"a": {"checkin"}})
+    with open(checkpoint.journal_path, "a", encoding="utf-8") as file:
+        file.write('{"cycle":1,"account":"a","done":true}\n')
+    resumed = CycleCheckpoint(path)
+    resumed.load()
+    assert resumed.pending() == {"a": {"checkin"}}
+    checkpoint.close()
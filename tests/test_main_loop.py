@@ -0,0 +1,39 @@
+import asyncio
+
+import main
+from StateStore import StateStore
+from tests.test_account_source import raw_line
+
+def test_emptied_data_file_waits_for_accounts_instead_of_exiting(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data.txt").write_text(raw_line(1) + "\n", encoding="utf-8")
+    monkeypatch.setattr(main, "_state_store", StateStore(str(tmp_path / "state.db")))
+    monkeypatch.setattr(main, "_checkpoint", None)
+    monkeypatch.setattr(main, "checkpoint_file", str(tmp_path / "checkpoint.json"))
+    cycles = []
+    pauses = []
+
+    async def run_cycle(accounts, due=None):
+        cycles.append(len(due))
+        if len(cycles) == 1:
+            # Saved empty between cycles, e.g. truncated by an editor mid-save
+            (tmp_path / "data.txt").write_text("", encoding="utf-8")
+            return {"succeeded": 1, "failed": 0, "skipped": 0}
+        raise SystemExit("stop test")
+
+    async def pause(seconds, reason):
+        pauses.append(reason)
+        if len(pauses) == 2:
+            (tmp_path / "data.txt").write_text(raw_line(2) + "\n", encoding="utf-8")
+        await asyncio.sleep(0)
+
+    monkeypatch.setattr(main, "run_cycle", run_cycle)
+    monkeypatch.setattr(main, "pause", pause)
+    try:
+        asyncio.run(main.main())
+    finally:
+        main._state_store.close()
+        if main._checkpoint is not None:
+            main._checkpoint.close()
+    assert cycles == [1, 1]
+    assert pauses == ["scheduler_idle", "scheduler_idle"]
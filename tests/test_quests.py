@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+import main
+from Models import QuestInfo
+from StateStore import StateStore
+
+def test_timeout_cancels_in_flight_claims(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "_state_store", StateStore(str(tmp_path / "state.db")))
+    claims_finished = []
+
+    async def get_quests(quest_type="daily"):
+        return [QuestInfo(1, "DAILY", "ready"), QuestInfo(2, "DAILY", "verifying")]
+
+    async def quest_progress(quest_id, quest_type="daily"):
+        return "CLAIM" if quest_id == 1 else "VERIFY"
+
+    async def claim_quest(quest_id, quest_type="daily"):
+        await asyncio.sleep(10)
+        claims_finished.append(quest_id)
+        return True
+
+    async def scenario():
+        api = main.MemesWarAPI("init")
+        monkeypatch.setattr(api, "get_quests", get_quests)
+        monkeypatch.setattr(api, "quest_progress", quest_progress)
+        monkeypatch.setattr(api, "claim_quest", claim_quest)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(api.complete_all_quests("daily"), 0.2)
+        await api.close()
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    try:
+        assert asyncio.run(scenario()) == []
+    finally:
+        main._state_store.close()
+    assert claims_finished == []
+
+def test_failed_quest_fetch_is_not_success(monkeypatch):
+    async def scenario(result):
+        api = main.MemesWarAPI("init")
+
+        async def get_quests(quest_type="daily"):
+            return result
+
+        monkeypatch.setattr(api, "get_quests", get_quests)
+        try:
+            return await api.complete_all_quests("daily")
+        finally:
+            await api.close()
+
+    assert asyncio.run(scenario(None)) is False
+    assert asyncio.run(scenario([])) is True
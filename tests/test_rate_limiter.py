@@ -0,0 +1,13 @@
+import asyncio
+
+from RateLimiter import RateLimiter
+
+def test_contended_limiter_works_across_event_loops():
+    # Built outside any loop like the module-level limiter in main, then used by two asyncio.run calls
+    limiter = RateLimiter(200, burst=1)
+
+    async def scenario():
+        await asyncio.gather(*(limiter.acquire() for _ in range(10)))
+
+    asyncio.run(scenario())
+    asyncio.run(scenario())
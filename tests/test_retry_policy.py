@@ -0,0 +1,67 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+import main
+from APIEndpointError import CircuitOpenError
+from mock_server import MockMemesWarServer
+from RetryPolicy import CircuitBreaker, RetryPolicy
+
+def test_breaker_opens_then_allows_a_single_probe():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+def test_cancelled_probe_does_not_wedge_the_breaker(monkeypatch):
+    async def scenario():
+        server = MockMemesWarServer(latency=0.5)
+        base_url = await server.start()
+        monkeypatch.setattr(main, "EXPECTED_BASE_URL", base_url)
+        monkeypatch.setattr(main, "retry_policy", RetryPolicy(1, 0.01, 0.01, 1, 0))
+        breaker = main.retry_policy.breaker("user")
+        breaker.record_failure()
+        assert breaker.state == "half_open"
+        try:
+            async with main.MemesWarAPI("init") as api:
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(api.get_user_info(print_info=False), 0.1)
+                assert breaker.allow()
+                breaker.release()
+                server.latency = 0
+                assert await api.get_user_info(print_info=False) is not None
+        finally:
+            await main.close_connector()
+            await server.stop()
+
+    asyncio.run(scenario())
+
+def test_posts_are_only_resent_when_the_connection_never_opened():
+    disconnected = aiohttp.ServerDisconnectedError()
+    assert main.is_safe_to_resend("GET", disconnected)
+    assert main.is_safe_to_resend("PUT", asyncio.TimeoutError())
+    assert not main.is_safe_to_resend("POST", disconnected)
+    assert not main.is_safe_to_resend("POST", asyncio.TimeoutError())
+
+def test_open_breaker_rejects_without_sending(monkeypatch):
+    async def scenario():
+        server = MockMemesWarServer()
+        base_url = await server.start()
+        monkeypatch.setattr(main, "EXPECTED_BASE_URL", base_url)
+        monkeypatch.setattr(main, "retry_policy", RetryPolicy(1, 0.01, 0.01, 1, 60))
+        main.retry_policy.breaker("user").record_failure()
+        try:
+            async with main.MemesWarAPI("init") as api:
+                with pytest.raises(CircuitOpenError):
+                    await api.get_user_info(print_info=False)
+        finally:
+            await main.close_connector()
+            await server.stop()
+        return server.request_count
+
+    assert asyncio.run(scenario()) == 0
@@ -0,0 +1,25 @@
+import sqlite3
+
+from StateStore import StateStore
+
+def test_writes_are_visible_at_once_but_committed_on_flush(tmp_path):
+    path = str(tmp_path / "state.db")
+    state = StateStore(path)
+    state.record_step("a", "checkin", "done")
+    state.mark_quest_done("a", "daily", 7)
+    assert state.step_done("a", "checkin", daily=True)
+    assert state.completed_quests("a", "daily") == {"7"}
+    assert state.completed_quests("b", "daily") == set()
+
+    other = sqlite3.connect(path)
+    assert other.execute("SELECT COUNT(*) FROM quests").fetchone() == (0,)
+    state.flush()
+    assert other.execute("SELECT COUNT(*) FROM quests").fetchone() == (1,)
+    assert other.execute("SELECT outcome FROM steps WHERE account = 'a'").fetchone() == ("done",)
+    other.close()
+
+    state.record_step("a", "referral", "done")
+    state.close()
+    reopened = StateStore(path)
+    assert reopened.step_done("a", "referral")
+    reopened.close()
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import time
+import urllib.parse
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+import main
+from Checkpoint import CycleCheckpoint
+from mock_server import MockMemesWarServer
+from StateStore import StateStore
+from TaskGraph import TaskGraph
+
+def test_step_exception_fails_only_that_step():
+    finished = []
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        finished.append("slow")
+
+    async def dependent():
+        finished.append("dependent")
+
+    async def scenario():
+        graph = TaskGraph()
+        graph.add("broken", broken)
+        graph.add("slow", slow)
+        graph.add("dependent", dependent, requires=("broken",))
+        graph.add("last", dependent, after=("broken", "slow"))
+        return graph, await graph.run()
+
+    graph, outcomes = asyncio.run(scenario())
+    assert outcomes == {"broken": "failed", "slow": "done", "dependent": "blocked", "last": "done"}
+    assert isinstance(graph.errors["broken"], RuntimeError)
+    assert finished == ["slow", "dependent"]
+
+def test_timeout_raised_by_the_step_is_a_failure_not_the_deadline():
+    async def request_timed_out():
+        raise aiohttp.ServerTimeoutError("read timeout")
+
+    async def too_slow():
+        await asyncio.sleep(1)
+
+    async def scenario():
+        graph = TaskGraph()
+        graph.add("no_deadline", request_timed_out)
+        graph.add("with_deadline", request_timed_out, timeout=5)
+        graph.add("too_slow", too_slow, timeout=0.05)
+        return graph, await graph.run()
+
+    graph, outcomes = asyncio.run(scenario())
+    assert outcomes == {"no_deadline": "failed", "with_deadline": "failed", "too_slow": "timeout"}
+    assert isinstance(graph.errors["no_deadline"], aiohttp.ServerTimeoutError)
+    assert isinstance(graph.errors["with_deadline"], aiohttp.ServerTimeoutError)
+    assert "too_slow" not in graph.errors
+
+def test_system_exit_reaches_caller_and_cancels_siblings():
+    cancelled = []
+
+    async def stop():
+        raise SystemExit("api changed")
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+
+    async def scenario():
+        graph = TaskGraph()
+        graph.add("stop", stop)
+        graph.add("slow", slow)
+        # Must be catchable inside the coroutine, not escape from the event loop
+        with pytest.raises(SystemExit):
+            await graph.run()
+        return "drained"
+
+    assert asyncio.run(scenario()) == "drained"
+    assert cancelled == ["slow"]
+
+def test_fatal_predicate_reraises_matching_errors():
+    async def changed():
+        raise KeyError("changed")
+
+    async def scenario():
+        graph = TaskGraph(fatal=lambda e: isinstance(e, KeyError))
+        graph.add("changed", changed)
+        with pytest.raises(KeyError):
+            await graph.run()
+
+    asyncio.run(scenario())
+
+class CheckInRemovedServer(MockMemesWarServer):
+    async def check_in(self, request):
+        raise web.HTTPNotFound()
+
+def synthetic_account(i: int) -> str:
+    user = json.dumps({"id": 8100000 + i, "first_name": f"t{i}"})
+    raw = f"query_id=T{i}&user={urllib.parse.quote(user)}&auth_date={int(time.time())}&hash={i:064x}"
+    return main.encode_init_data(raw)
+
+def test_api_change_in_validation_drains_run_cycle(tmp_path, monkeypatch):
+    async def scenario():
+        server = CheckInRemovedServer()
+        base_url = await server.start()
+        monkeypatch.setattr(main, "EXPECTED_BASE_URL", base_url)
+        monkeypatch.setattr(main, "_state_store", StateStore(str(tmp_path / "state.db")))
+        monkeypatch.setattr(main, "_checkpoint", CycleCheckpoint(None))
+        main.endpoint_health.clear()
+        main.retry_policy.clear()
+        main.quest_catalog.clear()
+        try:
+            with pytest.raises(SystemExit):
+                await main.run_cycle([synthetic_account(i) for i in range(4)])
+        finally:
+            await main.close_connector()
+            main._state_store.close()
+            await server.stop()
+        return "drained"
+
+    assert asyncio.run(scenario()) == "drained"
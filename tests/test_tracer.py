@@ -0,0 +1,36 @@
+import asyncio
+import json
+
+from Tracer import Tracer
+
+def test_track_metadata_counts_against_the_cap():
+    tracer = Tracer("unused.json", max_events=10)
+
+    async def span(i):
+        with tracer.span(f"step {i}"):
+            await asyncio.sleep(0)
+
+    async def scenario():
+        await asyncio.gather(*(span(i) for i in range(10)))
+
+    asyncio.run(scenario())
+    assert len(tracer.events) <= 10
+    assert tracer.dropped > 0
+    named = {event["tid"] for event in tracer.events if event["name"] == "thread_name"}
+    assert all(event["tid"] in named for event in tracer.events if event["ph"] == "X")
+
+def test_write_starts_a_new_buffer_per_file(tmp_path):
+    tracer = Tracer(str(tmp_path / "trace.json"), max_events=100)
+
+    async def scenario(path):
+        with tracer.span("step"):
+            await asyncio.sleep(0)
+        tracer.write(path)
+
+    for cycle in (1, 2):
+        asyncio.run(scenario(str(tmp_path / f"trace.cycle{cycle}.json")))
+        assert tracer.empty
+
+    for cycle in (1, 2):
+        events = json.loads((tmp_path / f"trace.cycle{cycle}.json").read_text())["traceEvents"]
+        assert [event["name"] for event in events] == ["process_name", "thread_name", "thread_sort_index", "step"]
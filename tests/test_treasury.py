@@ -0,0 +1,52 @@
+import asyncio
+import sqlite3
+import time
+
+import main
+from mock_server import MockMemesWarServer
+from StateStore import StateStore
+
+def test_cooldown_is_scheduled_from_the_reported_time(tmp_path, monkeypatch):
+    state = StateStore(str(tmp_path / "state.db"))
+    monkeypatch.setattr(main, "_state_store", state)
+
+    async def scenario():
+        server = MockMemesWarServer(treasury_cooldown=1800)
+        base_url = await server.start()
+        monkeypatch.setattr(main, "EXPECTED_BASE_URL", base_url)
+        try:
+            async with main.MemesWarAPI("init") as api:
+                claimed = await api.claim_single_treasury()
+                cooldown = await api.claim_single_treasury()
+            return claimed, cooldown
+        finally:
+            await main.close_connector()
+            await server.stop()
+
+    try:
+        claimed, cooldown = asyncio.run(scenario())
+        assert claimed.claimed and claimed.left_seconds == 1800
+        assert not cooldown.claimed and 1790 <= cooldown.left_seconds <= 1800
+        outcome, _, due_at = state.get_step(main.get_account_key("init"), "treasury")
+        assert outcome == "cooldown"
+        now = time.time()
+        deadline = main.next_deadline(state, main.get_account_key("init"), "treasury", now)
+        assert deadline == due_at and deadline - now > main.TASK_RETRY_DELAY
+    finally:
+        state.close()
+
+def test_existing_database_gets_the_due_at_column(tmp_path):
+    path = str(tmp_path / "state.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE steps (account TEXT NOT NULL, step TEXT NOT NULL, outcome TEXT NOT NULL, "
+        "updated_at REAL NOT NULL, PRIMARY KEY (account, step))"
+    )
+    conn.execute("INSERT INTO steps VALUES ('a', 'treasury', 'done', 100.0)")
+    conn.commit()
+    conn.close()
+
+    state = StateStore(path)
+    assert state.get_step("a", "treasury") == ("done", 100.0, None)
+    assert main.next_deadline(state, "a", "treasury", now=200.0) == 100.0 + main.TREASURY_INTERVAL
+    state.close()
@@ -0,0 +1,35 @@
+import asyncio
+
+import main
+from Models import UserInfo
+
+def test_failed_send_reconciles_once_and_retries(monkeypatch):
+    sends = []
+    user_reads = []
+
+    async def send_warbonds(guild_id, warbond_count):
+        sends.append(warbond_count)
+        if warbond_count > 300:
+            api.ledger.mark_stale()
+            return False
+        api.ledger.debit(warbond_count)
+        return True
+
+    async def get_user_info(print_info=True):
+        user_reads.append(print_info)
+        return UserInfo("nick", 10, 5, "300")
+
+    async def scenario():
+        result = await api.settle_warbonds()
+        await api.close()
+        return result
+
+    api = main.MemesWarAPI("init")
+    monkeypatch.setattr(api, "send_warbonds", send_warbonds)
+    monkeypatch.setattr(api, "get_user_info", get_user_info)
+    # Over-counted: a reward amount was credited twice
+    api.ledger.reconcile(500)
+    assert asyncio.run(scenario())
+    assert sends == [500, 300]
+    assert len(user_reads) == 1
+    assert api.ledger.balance == 0